@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from typing import Callable, NamedTuple
+
+from node_store import NodeStore
+
+Cell = tuple[int, int]
+
+
+class SearchSnapshot(NamedTuple):
+    # what the search did since the previous snapshot; the last one has is_done set and the path if it was found
+    opened: tuple[Cell, ...]  # cells seen for the first time
+    dead_ends: tuple[Cell, ...]  # expanded cells that opened or shortened nothing
+    closest: Cell  # the last expanded cell, None before the first expansion
+    expansions: int  # since the start of the search
+    open_size: int
+    path: tuple[Cell, ...] = ()
+    cost: float = None
+    is_done: bool = False
+
+
+class BackgroundSolver:
+    # A* of NodeStore in a daemon thread: the walls are read in the thread too, so the frame loop only picks up
+    # the snapshots with poll. The search is not told about wall edits, the owner cancels it and starts a new one
+    def __init__(self, height: int, width: int, is_wall: Callable[[int, int], bool], start: Cell, goal: Cell,
+                 publish_interval=0.02):
+        self.height, self.width = height, width
+        self.is_wall = is_wall
+        self.start, self.goal = start, goal
+        self.publish_interval = publish_interval  # seconds between snapshots
+        self.snapshots: queue.SimpleQueue[SearchSnapshot] = queue.SimpleQueue()
+        self.cancelled = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def begin(self) -> None:
+        self.thread.start()
+
+    def cancel(self) -> None:
+        # the thread stops after the expansion it is making and publishes nothing more
+        self.cancelled.set()
+
+    def poll(self) -> list[SearchSnapshot]:
+        snapshots = []
+        while True:
+            try:
+                snapshots.append(self.snapshots.get_nowait())
+            except queue.Empty:
+                return snapshots
+
+    def run(self) -> None:
+        nodes = NodeStore(self.height, self.width, self.is_wall)
+        nodes.begin(self.start, self.goal)
+        opened, dead_ends, closest = [], [], None
+        expansions = 0
+        published = time.perf_counter()
+        while not self.cancelled.is_set():
+            node = nodes.pop_closest()
+            if node == -1:
+                self.publish(SearchSnapshot(tuple(opened), tuple(dead_ends), closest, expansions, 0, is_done=True))
+                return
+            closest = nodes.get_cell(node)
+            seen, shortened = nodes.expand(node)
+            expansions += 1
+            if nodes.state[nodes.goal]:
+                self.publish(SearchSnapshot(tuple(opened), tuple(dead_ends), closest, expansions, nodes.open_count,
+                                            tuple(nodes.get_path()), nodes.g[nodes.goal], True))
+                return
+            opened += [nodes.get_cell(n) for n in seen]
+            if not seen and not shortened:
+                dead_ends.append(closest)
+            if time.perf_counter() - published >= self.publish_interval:
+                self.publish(SearchSnapshot(tuple(opened), tuple(dead_ends), closest, expansions, nodes.open_count))
+                opened, dead_ends = [], []
+                published = time.perf_counter()
+
+    def publish(self, snapshot: SearchSnapshot) -> None:
+        if not self.cancelled.is_set():
+            self.snapshots.put(snapshot)
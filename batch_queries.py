@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+from typing import Iterable, Iterator
+
+import numpy
+
+from bit_grid import pad_walls
+from maze_file import get_walls
+from node_store import NodeStore
+from test import Maze, Point, SolveResult
+
+# state of a pool worker, set once by init_worker: the A* arrays over the walls of the shared plane
+worker_nodes: NodeStore = None
+
+
+def init_worker(memory_name: str, height: int, width: int) -> None:
+    # the plane is unpacked once per worker; the queries only search, nothing is marked, drawn or cached
+    global worker_nodes
+    memory = shared_memory.SharedMemory(name=memory_name)
+    plane = numpy.ndarray(((height * width + 7) // 8,), dtype=numpy.uint8, buffer=memory.buf)
+    walls = numpy.unpackbits(plane, count=height * width).reshape(height, width).astype(bool)
+    memory.close()
+    worker_nodes = NodeStore(height, width, blocked=pad_walls(walls))
+
+
+def solve_query(query: tuple[int, tuple[Point, Point]]) -> tuple[int, SolveResult]:
+    # plain A* of NodeStore, the same search as the A* of Maze.solve without its markers
+    index, (start, goal) = query
+    nodes = worker_nodes
+    started = time.perf_counter()
+    if not 0 <= start.row < nodes.height or not 0 <= start.col < nodes.width \
+            or not 0 <= goal.row < nodes.height or not 0 <= goal.col < nodes.width \
+            or nodes.blocked[nodes.get_id(start.row, start.col)] or nodes.blocked[nodes.get_id(goal.row, goal.col)]:
+        return index, SolveResult([], None, 0, 0, 0)
+    if start == goal:
+        return index, SolveResult([Point(start.row, start.col)], 0, 0, 0, 0)
+    nodes.begin((start.row, start.col), (goal.row, goal.col))
+    expansions, peak_search_area = 0, nodes.open_count
+    while not nodes.state[nodes.goal]:
+        node = nodes.pop_closest()
+        if node == -1:
+            return index, SolveResult([], None, expansions, peak_search_area, time.perf_counter() - started)
+        nodes.expand(node)
+        expansions += 1
+        peak_search_area = max(peak_search_area, nodes.open_count)
+    path = [Point(row, col) for row, col in nodes.get_path()]
+    return index, SolveResult(path, nodes.g[nodes.goal], expansions, peak_search_area, time.perf_counter() - started)
+
+
+def solve_batch(maze: Maze, queries: Iterable[tuple[Point, Point]], processes: int = None,
+                chunk_size: int = 16) -> Iterator[tuple[int, SolveResult]]:
+    # solves every (start, goal) query on the walls of maze in a process pool with A*; results come as soon as
+    # they are ready, in any order, together with the index of their query. The walls are put into shared memory
+    # once, 1 bit per cell, so the workers never receive the maze itself
+    walls = numpy.packbits(get_walls(maze), axis=None)
+    memory = shared_memory.SharedMemory(create=True, size=max(walls.nbytes, 1))
+    try:
+        numpy.ndarray(walls.shape, dtype=numpy.uint8, buffer=memory.buf)[:] = walls
+        with multiprocessing.Pool(processes, init_worker, (memory.name, maze.height, maze.width)) as pool:
+            yield from pool.imap_unordered(solve_query, enumerate(queries), chunk_size)
+    finally:
+        memory.close()
+        memory.unlink()
+
+
+def get_free_cells(maze: Maze) -> list[Point]:
+    walls = get_walls(maze)
+    return [Point(int(row), int(col)) for row, col in zip(*numpy.nonzero(~walls))]
+
+
+if __name__ == '__main__':
+    import random
+
+    maze = Maze(201, 201, compact=True, seed=1)
+    cells = get_free_cells(maze)
+    rng = random.Random(1)
+    queries = [(rng.choice(cells), rng.choice(cells)) for _ in range(200)]
+    started = time.perf_counter()
+    found = sum(result.is_found for _, result in solve_batch(maze, queries))
+    print(f"{found} of {len(queries)} paths in {time.perf_counter() - started:.2f} s")
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # rendering is measured without a window
+
+import pygame
+
+from eller_algorithm import generate_labyrinth
+from test import Maze, Point
+
+SEED = 12345
+SIZES = [21, 51, 101, 201, 501]  # 1001 and 2001 work too, but a full solve of them takes minutes
+
+
+def make_maze(size: int, walls=True, compact=False, palette=False) -> Maze:
+    # the same maze for the same size, from the top left to the bottom right corner
+    maze = Maze(size, size, seed=SEED, compact=compact, path_cache_size=0, palette=palette)
+    if not walls:
+        maze.rebuild(walls=False, seed=SEED)
+    maze.set_endpoints(Point(1, 1), Point(maze.height - 2, maze.width - 2))
+    return maze
+
+
+def setup_generate(size: int):
+    return random.Random(SEED)
+
+
+def run_generate(size: int, rng: random.Random) -> dict:
+    generate_labyrinth(size // 2, size // 2, rng)
+    return {}
+
+
+def run_generate_tiled(size: int, state) -> dict:
+    from tiled_generation import generate_tiled_walls  # needs numpy
+    generate_tiled_walls(size, size, seed=SEED)
+    return {}
+
+
+def run_rasterize(size: int, compact: bool) -> dict:
+    Maze(size, size, seed=SEED, compact=compact, path_cache_size=0)
+    return {}
+
+
+def run_solve(size: int, maze: Maze) -> dict:
+    result = maze.solve()
+    return {"expansions": result.expansions, "cost": result.cost}
+
+
+def setup_render(size: int, palette=False) -> tuple[Maze, pygame.Surface]:
+    pygame.display.init()
+    return make_maze(size, palette=palette), pygame.display.set_mode((580, 580))
+
+
+def setup_render_step(size: int, palette=False) -> tuple[Maze, pygame.Surface]:
+    # the first step builds the connectivity index and the first draw the whole picture, neither is a usual frame
+    maze, display = setup_render(size, palette)
+    maze.working = True
+    maze.next_step()
+    maze.draw_on_screen(display, (250, 250, 250), (20, 20, 560, 560))
+    return maze, display
+
+
+def run_render_full(size: int, state: tuple[Maze, pygame.Surface]) -> dict:
+    maze, display = state
+    maze.is_redraw_needed = True
+    maze.draw_on_screen(display, (250, 250, 250), (20, 20, 560, 560))
+    return {}
+
+
+def run_render_step(size: int, state: tuple[Maze, pygame.Surface]) -> dict:
+    # a frame of the demo: one search step and the cells it changed
+    maze, display = state
+    maze.next_step()
+    maze.draw_on_screen(display, (250, 250, 250), (20, 20, 560, 560))
+    return {}
+
+
+# name: (setup, run), setup(size) makes what run(size, state) needs and is not measured
+CASES = {
+    "generate": (setup_generate, run_generate),
+    "generate_tiled": (lambda size: None, run_generate_tiled),
+    "rasterize": (lambda size: False, run_rasterize),
+    "rasterize_compact": (lambda size: True, run_rasterize),
+    "solve_walls": (lambda size: make_maze(size), run_solve),
+    "solve_empty": (lambda size: make_maze(size, walls=False), run_solve),
+    "render_full": (setup_render, run_render_full),
+    "render_step": (setup_render_step, run_render_step),
+    "render_full_palette": (lambda size: setup_render(size, palette=True), run_render_full),
+    "render_step_palette": (lambda size: setup_render_step(size, palette=True), run_render_step),
+}
+
+
+def measure(name: str, size: int, repeat: int) -> dict:
+    # the best time of repeat runs, then one more run under tracemalloc for the peak memory
+    setup, run = CASES[name]
+    times = []
+    for _ in range(repeat):
+        state = setup(size)
+        started = time.perf_counter()
+        extra = run(size, state)
+        times.append(time.perf_counter() - started)
+    state = setup(size)
+    tracemalloc.start()
+    run(size, state)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"time": min(times), "peak_kib": peak / 1024, **extra}
+
+
+def run_benchmarks(names: list[str], sizes: list[int], repeat: int) -> dict:
+    results = {}
+    for size in sizes:
+        for name in names:
+            key = f"{name}/{size}"
+            results[key] = measure(name, size, repeat)
+            print(format_result(key, results[key]), flush=True)
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": SEED,
+        "results": results,
+    }
+
+
+def format_result(key: str, result: dict) -> str:
+    line = f"{key:<24} {result['time'] * 1000:>10.2f} ms {result['peak_kib']:>10.1f} KiB"
+    if "expansions" in result:
+        line += f" {result['expansions']:>8} expansions"
+    return line
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    # returns the cases that got slower than threshold times the baseline or changed their number of expansions
+    regressions = []
+    for key, result in current["results"].items():
+        old = baseline["results"].get(key)
+        if old is None:
+            continue
+        ratio = result["time"] / old["time"] if old["time"] else 1
+        note = ""
+        if ratio > threshold:
+            note = " slower"
+        if result.get("expansions") != old.get("expansions"):
+            note += f" expansions {old.get('expansions')} -> {result.get('expansions')}"
+        print(f"{key:<24} {old['time'] * 1000:>10.2f} -> {result['time'] * 1000:>10.2f} ms x{ratio:.2f}{note}")
+        if note:
+            regressions.append(key)
+    return regressions
+
+
+def main(args: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Times maze generation, search and rendering with fixed seeds")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write the results as a JSON baseline")
+    parser.add_argument("--compare", help="JSON baseline to compare the results with")
+    parser.add_argument("--threshold", type=float, default=1.25, help="time ratio reported as a regression")
+    options = parser.parse_args(args)
+
+    current = run_benchmarks(options.cases, options.sizes, options.repeat)
+    if options.output:
+        with open(options.output, "w") as file:
+            json.dump(current, file, indent=2)
+    if options.compare:
+        with open(options.compare) as file:
+            regressions = compare(json.load(file), current, options.threshold)
+        if regressions:
+            print(f"{len(regressions)} regressions: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import random
+
+import numpy
+
+from eller_algorithm import generate_rows
+from test import Marker, Point
+
+
+def generate_borders(width: int, height: int, rng: random.Random = random) -> tuple[numpy.ndarray, numpy.ndarray]:
+    # same borders as generate_labyrinth, but collected row by row straight into arrays
+    right_borders = numpy.empty((height, width), dtype=bool)
+    down_borders = numpy.empty((height, width), dtype=bool)
+    for row, (cur_right_borders, cur_down_borders) in enumerate(generate_rows(width, height, rng)):
+        right_borders[row] = cur_right_borders
+        down_borders[row] = cur_down_borders
+    return right_borders, down_borders
+
+
+def wall_mask(right_borders: numpy.ndarray, down_borders: numpy.ndarray) -> numpy.ndarray:
+    # the field layout of Maze.generate_walls: cell (r, c) of the labyrinth is field cell (2r + 1, 2c + 1),
+    # its right border is the cell to the right of it and its down border is the cell below it
+    height, width = right_borders.shape
+    walls = numpy.zeros((2 * height + 1, 2 * width + 1), dtype=bool)
+    walls[0, :] = True
+    walls[:, 0] = True
+    walls[1::2, 2::2] |= right_borders
+    walls[2::2, 2::2] |= right_borders | down_borders
+    walls[2::2, 1::2] |= down_borders
+    return walls
+
+
+def pad_walls(walls: numpy.ndarray) -> bytearray:
+    # Maze.get_blocked of a field given as a bool array of its walls
+    return bytearray(numpy.pad(walls, 1, constant_values=True).astype(numpy.uint8).tobytes())
+
+
+class MarkerSet:
+    # list-like view of the markers of one BitGrid cell, so the Maze code can use it as Point.markers
+    def __init__(self, grid: BitGrid, row: int, col: int):
+        self.grid, self.row, self.col = grid, row, col
+
+    def __contains__(self, marker: Marker) -> bool:
+        return self.grid.has_marker(self.row, self.col, marker)
+
+    def __iter__(self):
+        flags = self.grid.get_flags(self.row, self.col)
+        for marker in Marker:
+            if marker.flag & flags or marker is Marker.custom and (self.row, self.col) in self.grid.colors:
+                yield marker
+
+    def __len__(self):
+        return len(list(iter(self)))
+
+    def append(self, marker: Marker) -> None:
+        self.grid.add_marker(self.row, self.col, marker)
+
+    def remove(self, marker: Marker) -> None:
+        if marker not in self:
+            raise ValueError(f"{marker} is not in {self.row},{self.col}")
+        self.grid.remove_marker(self.row, self.col, marker)
+
+
+class GridPoint(Point):
+    # Point that reads and writes its markers and color from a BitGrid instead of keeping its own
+    def __init__(self, grid: BitGrid, row: int, col: int):
+        self.grid = grid
+        self.row, self.col = row, col
+
+    @property
+    def markers(self) -> MarkerSet:
+        return MarkerSet(self.grid, self.row, self.col)
+
+    @markers.setter
+    def markers(self, markers: list[Marker]) -> None:
+        self.grid.set_markers(self.row, self.col, markers)
+
+    @property
+    def color(self) -> tuple[int, int, int]:
+        return self.grid.colors.get((self.row, self.col))
+
+    @color.setter
+    def color(self, color: tuple[int, int, int]) -> None:
+        self.grid.colors[self.row, self.col] = color
+
+
+class GridRow:
+    def __init__(self, grid: BitGrid, row: int):
+        self.grid, self.row = grid, row
+
+    def __len__(self):
+        return self.grid.width
+
+    def __getitem__(self, col: int) -> GridPoint:
+        if not -self.grid.width <= col < self.grid.width:
+            raise IndexError(col)
+        return GridPoint(self.grid, self.row, col % self.grid.width)
+
+    def __iter__(self):
+        for col in range(self.grid.width):
+            yield GridPoint(self.grid, self.row, col)
+
+
+class BitGrid:
+    # one uint8 per cell, every Marker but custom is a bit of it (see Marker.flag);
+    # custom markers live in self.colors together with their color
+    def __init__(self, height: int, width: int):
+        self.height, self.width = height, width
+        self.cells = numpy.full((height, width), Marker.empty.flag, dtype=numpy.uint8)
+        self.colors: dict[tuple[int, int], tuple[int, int, int]] = {}
+
+    def __len__(self):
+        return self.height
+
+    def __getitem__(self, row: int) -> GridRow:
+        if not -self.height <= row < self.height:
+            raise IndexError(row)
+        return GridRow(self, row % self.height)
+
+    def __iter__(self):
+        for row in range(self.height):
+            yield GridRow(self, row)
+
+    def get_flags(self, row: int, col: int) -> int:
+        return int(self.cells[row, col])
+
+    def set_flags(self, row: int, col: int, flags: int) -> None:
+        self.cells[row, col] = flags
+
+    def has_marker(self, row: int, col: int, marker: Marker) -> bool:
+        if marker is Marker.custom:
+            return (row, col) in self.colors
+        return self.get_flags(row, col) & marker.flag != 0
+
+    def add_marker(self, row: int, col: int, marker: Marker) -> None:
+        if marker is Marker.custom:
+            self.colors.setdefault((row, col), None)
+        else:
+            self.set_flags(row, col, self.get_flags(row, col) | marker.flag)
+
+    def remove_marker(self, row: int, col: int, marker: Marker) -> None:
+        if marker is Marker.custom:
+            self.colors.pop((row, col), None)
+        else:
+            self.set_flags(row, col, self.get_flags(row, col) & ~marker.flag)
+
+    def set_walls(self, walls: numpy.ndarray, top=0) -> None:
+        # walls are the rows of the field from top on
+        self.cells[top:top + len(walls)][walls] = Marker.wall.flag
+        for row, col in list(self.colors):
+            if top <= row < top + len(walls) and walls[row - top, col]:
+                del self.colors[row, col]
+
+    def get_blocked(self) -> bytearray:
+        return pad_walls(self.cells & Marker.wall.flag != 0)
+
+    def generate_walls(self, rng: random.Random = random) -> None:
+        self.set_walls(wall_mask(*generate_borders(self.width // 2, self.height // 2, rng)))
+
+    def set_markers(self, row: int, col: int, markers: list[Marker]) -> None:
+        flags = 0
+        for marker in markers:
+            flags |= marker.flag
+        self.set_flags(row, col, flags)
+        if Marker.custom in markers:
+            self.colors.setdefault((row, col), None)
+        else:
+            self.colors.pop((row, col), None)
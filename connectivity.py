@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import itertools
+from array import array
+from collections import deque
+
+from eller_algorithm import find_set, merge_sets
+
+WALL, UNLABELED = -2, -1
+
+
+class Components:
+    # labels of the 8-connected components of free cells: two cells are connected if the roots of their labels match.
+    # A cleared cell merges the labels around it, a new wall floods only the parts that may have been cut off.
+    # The labels are a flat array in the layout of NodeStore (the field inside a border of walls, indexed by
+    # the cell id), so the index takes 4 bytes a cell and is flooded without bounds checks
+    def __init__(self, height: int, width: int, blocked: bytearray):
+        # blocked is the field with its border, see Maze.get_blocked
+        self.height, self.width = height, width
+        self.stride = width + 2
+        self.labels = array('i', [UNLABELED]) * len(blocked)
+        for node in range(len(blocked)):
+            if blocked[node]:
+                self.labels[node] = WALL
+        self.parents: dict[int, int] = {}
+        self.next_label = itertools.count()
+        self.offsets = [d_row * self.stride + d_col
+                        for d_row in range(-1, 2) for d_col in range(-1, 2) if d_row or d_col]
+
+    def get_id(self, row: int, col: int) -> int:
+        return (row + 1) * self.stride + col + 1
+
+    def get_free_neighbors(self, node: int) -> list[int]:
+        labels = self.labels
+        return [node + offset for offset in self.offsets if labels[node + offset] != WALL]
+
+    def new_label(self) -> int:
+        label = next(self.next_label)
+        self.parents[label] = label
+        return label
+
+    def compute(self) -> None:
+        labels, offsets = self.labels, self.offsets
+        self.parents = {}
+        for node in range(len(labels)):
+            if labels[node] != UNLABELED:
+                continue
+            label = labels[node] = self.new_label()
+            queue = [node]
+            for current in queue:  # the list grows while it is walked, a queue without popping
+                for offset in offsets:
+                    n = current + offset
+                    if labels[n] == UNLABELED:
+                        labels[n] = label
+                        queue.append(n)
+
+    def is_connected(self, point, other) -> bool:
+        label = self.labels[self.get_id(point.row, point.col)]
+        other_label = self.labels[self.get_id(other.row, other.col)]
+        if label < 0 or other_label < 0:
+            return False
+        return find_set(self.parents, label) == find_set(self.parents, other_label)
+
+    def update_cell(self, row: int, col: int, is_blocked: bool) -> None:
+        node = self.get_id(row, col)
+        if not is_blocked:
+            if self.labels[node] != WALL:
+                return
+            neighbors = self.get_free_neighbors(node)
+            if not neighbors:
+                self.labels[node] = self.new_label()
+                return
+            label = self.labels[node] = find_set(self.parents, self.labels[neighbors[0]])
+            for n in neighbors[1:]:
+                if find_set(self.parents, self.labels[n]) != find_set(self.parents, label):
+                    merge_sets(self.parents, label, self.labels[n])
+            return
+        if self.labels[node] != WALL:
+            self.labels[node] = WALL
+            self.split(node)
+
+    def is_adjacent(self, node: int, other: int) -> bool:
+        return abs(node // self.stride - other // self.stride) <= 1 \
+            and abs(node % self.stride - other % self.stride) <= 1
+
+    def get_ring_groups(self, node: int) -> list[list[int]]:
+        # free neighbors of the new wall grouped by 8-adjacency between themselves;
+        # cells of one group stay connected whatever happens farther away
+        groups: list[list[int]] = []
+        for n in self.get_free_neighbors(node):
+            touching = [group for group in groups if any(self.is_adjacent(n, other) for other in group)]
+            merged = [n]
+            for group in touching:
+                groups.remove(group)
+                merged += group
+            groups.append(merged)
+        return groups
+
+    def split(self, node: int) -> None:
+        # floods from every group around the new wall in turn; floods that meet are joined,
+        # a flood that runs out before meeting the others is cut off and gets a new label.
+        # Only the last flood is never finished, so the work is bounded by the size of the smaller parts
+        groups = self.get_ring_groups(node)
+        if len(groups) <= 1:
+            return
+        owners: dict[int, int] = {}
+        parents = {index: index for index in range(len(groups))}
+        queues = {index: deque(group) for index, group in enumerate(groups)}
+        cells = {index: list(group) for index, group in enumerate(groups)}
+        for index, group in enumerate(groups):
+            for cell in group:
+                owners[cell] = index
+        while len(queues) > 1:
+            for index in list(queues):
+                if index not in queues or len(queues) == 1:
+                    continue
+                if not queues[index]:
+                    label = self.new_label()
+                    for cell in cells.pop(index):
+                        self.labels[cell] = label
+                    del queues[index]
+                    continue
+                for n in self.get_free_neighbors(queues[index].popleft()):
+                    owner = owners.get(n)
+                    if owner is None:
+                        owners[n] = index
+                        queues[index].append(n)
+                        cells[index].append(n)
+                    elif find_set(parents, owner) != index:
+                        other = find_set(parents, owner)
+                        parents[other] = index
+                        queues[index].extend(queues.pop(other))
+                        cells[index].extend(cells.pop(other))
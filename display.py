@@ -1,3 +1,6 @@
+import importlib.util
+import time
+
 import pygame
 from test import Maze, Point
 from pygame_utils import Button, Switch, Counter, Text
@@ -42,6 +45,22 @@ class LabyrinthDisplay:
             600, 150, 150, 50, Switch(
                 "Режим редактирования точек пути", lambda: self.maze.change_editing(), (0, 150, 0),
                 is_on=self.maze.is_alternative))
+        self.background_switch = ScreenObject(
+            600, 190, 150, 50, Switch(
+                "Фоновый поиск", lambda: self.maze.change_background(), (0, 150, 0),
+                is_on=self.maze.use_background))
+        self.strategy_button = ScreenObject(
+            600, 293, 150, 50, Button(f"Алгоритм: {self.maze.strategy}", self.change_strategy))
+        self.incremental_switch = ScreenObject(
+            600, 243, 150, 50, Switch(
+                "Инкрементальный поиск", lambda: self.maze.change_incremental(), (0, 150, 0),
+                is_on=self.maze.incremental))
+        self.distance_switch = ScreenObject(
+            600, 268, 150, 50, Switch(
+                "Поле расстояний", lambda: self.maze.change_distance_field(), (0, 150, 0),
+                is_on=self.maze.use_distance_field))
+        self.steps_form = ScreenObject(
+            600, 343, 0, 0, Counter("Шагов за кадр ", 1, up_method=lambda x: x * 2, down_method=lambda x: x // 2))
 
         odd_up, odd_down = lambda x: (x // 2 + 1) * 2 + 1, lambda x: (x // 2) * 2 - 1
         self.field_from_title = ScreenObject(600, 418, 0, 0, Text("Создать поле"))
@@ -51,10 +70,17 @@ class LabyrinthDisplay:
 
         self.objects = [
             self.maze_obj, self.solve_button, self.regenerate_button, self.empty_button, self.alternate_path,
+            self.background_switch,
+            self.strategy_button, self.incremental_switch, self.distance_switch, self.steps_form,
             self.field_from_title, self.rows_form, self.columns_form, self.confirm_creation]
 
         size = width, height = 800, 600
         self.FPS = 10
+        self.step_budget = 0.5 / self.FPS  # seconds of a frame the search may take, the rest is for input and drawing
+        self.panel_rect = pygame.Rect(580, 0, 220, 600)  # right side with the controls, repainted every frame
+        self.stats_rect = pygame.Rect(20, 20, 300, 140)  # overlay with Maze.stats over the maze, switched by TAB
+        self.stats_text = Text("")
+        self.is_stats_shown = False
 
         pygame.init()
         self.clock = pygame.time.Clock()
@@ -62,22 +88,71 @@ class LabyrinthDisplay:
         pygame.display.set_caption("Лабиринты")
 
     def recreate_maze(self):
-        self.maze = Maze(self.rows_form.draw_object.value, self.columns_form.draw_object.value)
+        self.maze.cancel_background()
+        rows, columns = self.rows_form.draw_object.value, self.columns_form.draw_object.value
+        # cells under two pixels are drawn in one scaled blit, if numpy is there for it
+        palette = max(rows, columns) * 2 > self.maze_obj.width and importlib.util.find_spec("numpy") is not None
+        self.maze = Maze(rows, columns, palette=palette)
         self.maze_obj.draw_object = self.maze
         self.alternate_path.draw_object.is_on = self.maze.is_alternative
-
-    def paint(self):
-        pygame.draw.rect(self.DISPLAY, (135, 196, 250), (0, 0, *self.DISPLAY.get_size()))
+        self.incremental_switch.draw_object.is_on = self.maze.incremental
+        self.distance_switch.draw_object.is_on = self.maze.use_distance_field
+        self.background_switch.draw_object.is_on = self.maze.use_background
+        self.strategy_button.draw_object.text = f"Алгоритм: {self.maze.strategy}"
+
+    def change_strategy(self):
+        self.maze.change_strategy()
+        self.strategy_button.draw_object.text = f"Алгоритм: {self.maze.strategy}"
+
+    def run_steps(self):
+        # as many steps as the counter says, but no longer than step_budget;
+        # the gradient of a found path moves once per frame, so its animation speed does not depend on the counter
+        deadline = time.perf_counter() + self.step_budget
+        for _ in range(self.steps_form.draw_object.value):
+            self.maze.next_step()
+            if not self.maze.working or self.maze.path_complete or self.maze.is_exhausted \
+                    or time.perf_counter() >= deadline:
+                break
+
+    def change_stats(self):
+        self.is_stats_shown = not self.is_stats_shown
+        self.maze.is_blit_needed = True  # puts the maze back under the overlay
+
+    def draw_stats(self) -> list[pygame.Rect]:
+        if not self.is_stats_shown:
+            return []
+        # the maze under the overlay is blitted again, only its changed cells are drawn by draw_on_screen
+        self.DISPLAY.blit(self.maze.surface, self.stats_rect, self.stats_rect.move(-20, -20))
+        shade = pygame.Surface(self.stats_rect.size, pygame.SRCALPHA)
+        shade.fill((0, 0, 0, 170))
+        self.DISPLAY.blit(shade, self.stats_rect)
+        self.stats_text.text = self.maze.stats.format()
+        self.stats_text.blit_text(self.DISPLAY, (self.stats_rect.left + 5, self.stats_rect.top + 5), WHITE)
+        return [self.stats_rect]
+
+    def paint(self, is_full=False) -> list[pygame.Rect]:
+        # returns the changed parts of the display: the panel and the cells of the maze that changed
+        if is_full:
+            pygame.draw.rect(self.DISPLAY, (135, 196, 250), (0, 0, *self.DISPLAY.get_size()))
+            pygame.draw.rect(self.DISPLAY, (0, 0, 0), (20, 20, 560, 560))
+            self.maze.is_blit_needed = True
+        else:
+            pygame.draw.rect(self.DISPLAY, (135, 196, 250), self.panel_rect)
         pygame.draw.rect(self.DISPLAY, (185, 160, 5), (590, 0, 560, 223))
+        pygame.draw.rect(self.DISPLAY, (185, 160, 5), (590, 233, 560, 165))
         pygame.draw.rect(self.DISPLAY, (185, 160, 5), (590, 408, 560, 560))
-        pygame.draw.rect(self.DISPLAY, (0, 0, 0), (20, 20, 560, 560))
+        # the search ran out or the goal is in another component than the start
+        self.solve_button.draw_object.text = "Цель недостижима" if self.maze.is_exhausted else "Решить лабиринт"
         for obj in self.objects:
             obj.draw(self.DISPLAY)
         # pygame.draw.rect(screen, BLUE, (200, 150, 100, 50))
+        return [self.panel_rect] + self.maze.updated_rects + self.draw_stats()
 
     def main(self):
         running = True
         hold = False
+        self.paint(is_full=True)
+        pygame.display.flip()
         while running:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT or event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
@@ -97,9 +172,10 @@ class LabyrinthDisplay:
                     hold = False
                 if event.type == pygame.KEYDOWN and event.key == pygame.K_RETURN:
                     self.maze.change_solving()
-            self.paint()
-            self.maze.next_step()
-            pygame.display.flip()
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_TAB:
+                    self.change_stats()
+            self.run_steps()
+            pygame.display.update(self.paint())
             self.clock.tick(self.FPS)
 
 
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import math
+from typing import Callable
+
+INFINITY = math.inf
+
+
+class DistanceField:
+    # distance to the goal from every reachable cell (one reverse Dijkstra over the 8-connected field) and the next
+    # cell of the shortest path from it, so the path from any start is a walk along next_hop
+    def __init__(self, goal, is_inbounds: Callable, is_blocked: Callable):
+        self.goal = goal
+        self.is_inbounds, self.is_blocked = is_inbounds, is_blocked
+        self.distance: dict = {}
+        self.next_hop: dict = {}
+        self.max_distance = 0  # distance of the farthest cell when the field was computed, the scale of the heat map
+        self.order = itertools.count()
+        self.expansions = 0
+
+    def cost(self, point, other) -> float:
+        return math.sqrt(2) if point.row != other.row and point.col != other.col else 1
+
+    def get_neighbors(self, point) -> list:
+        return [n for n in point.get_neighbors() if self.is_inbounds(n) and not self.is_blocked(n)]
+
+    def spread(self, heap: list) -> set:
+        # Dijkstra from the points already in heap, returns every point whose distance became shorter
+        changed = set()
+        while heap:
+            distance, _, point = heapq.heappop(heap)
+            if distance > self.distance.get(point, INFINITY):
+                continue
+            self.expansions += 1
+            for n in self.get_neighbors(point):
+                length = distance + self.cost(point, n)
+                if length < self.distance.get(n, INFINITY):
+                    self.distance[n], self.next_hop[n] = length, point
+                    heapq.heappush(heap, (length, next(self.order), n))
+                    changed.add(n)
+        return changed
+
+    def compute(self) -> None:
+        self.distance, self.next_hop = {self.goal: 0}, {}
+        self.spread([(0, next(self.order), self.goal)])
+        self.max_distance = max(self.distance.values())
+
+    def update_cell(self, point) -> set:
+        # repairs the field after the cell became a wall or was cleared, returns the points whose distance changed
+        if not self.is_blocked(point):
+            best = min(((self.distance[n] + self.cost(point, n), n) for n in self.get_neighbors(point)
+                        if n in self.distance), key=lambda item: item[0], default=None)
+            if best is None:
+                return set()
+            self.distance[point], self.next_hop[point] = best
+            return {point} | self.spread([(best[0], next(self.order), point)])
+        # a new wall: the cells whose path went through it lose their distance and take the best one of the border
+        subtree, lost = [point], {point}
+        for cell in subtree:
+            for n in cell.get_neighbors():
+                if n not in lost and n in self.next_hop and self.next_hop[n] == cell:
+                    lost.add(n)
+                    subtree.append(n)
+        for cell in subtree:
+            self.distance.pop(cell, None)
+            self.next_hop.pop(cell, None)
+        heap = []
+        for cell in subtree[1:]:
+            for n in self.get_neighbors(cell):
+                if n not in lost and self.distance[n] + self.cost(cell, n) < self.distance.get(cell, INFINITY):
+                    self.distance[cell], self.next_hop[cell] = self.distance[n] + self.cost(cell, n), n
+            if cell in self.distance:
+                heapq.heappush(heap, (self.distance[cell], next(self.order), cell))
+        return lost | self.spread(heap)
+
+    def get_distance(self, point) -> float:
+        return self.distance.get(point, INFINITY)
+
+    def get_heat(self, point) -> float:
+        # 0 at the goal, 1 at the farthest cell, None if the goal can not be reached from the point
+        if point not in self.distance:
+            return None
+        return min(self.distance[point] / self.max_distance, 1) if self.max_distance else 0
+
+    def get_path(self, start) -> list:
+        # empty if the goal can not be reached from start
+        if start not in self.distance:
+            return []
+        path = [start]
+        while path[-1] != self.goal:
+            path.append(self.next_hop[path[-1]])
+        return path
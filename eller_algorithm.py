@@ -1,58 +1,50 @@
 import random
+from collections import Counter
+from typing import Iterator
 
 
-def merge_sets(row: list[int], set_number1, set_number2) -> list[int]:
-    for i in range(len(row)):
-        if row[i] == set_number2:
-            row[i] = set_number1
-    return row
+def find_set(parents: dict[int, int], set_number: int) -> int:
+    while parents[set_number] != set_number:
+        parents[set_number] = parents[parents[set_number]]  # path halving
+        set_number = parents[set_number]
+    return set_number
+
 
+def merge_sets(parents: dict[int, int], set_number1, set_number2) -> None:
+    parents[find_set(parents, set_number2)] = find_set(parents, set_number1)
 
-def generate_right_borders(row: list[int]) -> tuple[list[bool], list[int]]:
+
+def generate_right_borders(row: list[int], rng: random.Random = random) -> tuple[list[bool], list[int]]:
     borders: list[bool] = [False for _ in range(len(row))]
+    parents: dict[int, int] = {set_number: set_number for set_number in row}
 
     for i in range(len(row) - 1):
-        choice: bool = bool(random.randint(0, 1))
-        if choice or row[i] == row[i + 1]:
+        choice: bool = bool(rng.randint(0, 1))
+        if choice or find_set(parents, row[i]) == find_set(parents, row[i + 1]):
             borders[i] = True
         else:
-            row = merge_sets(row, row[i], row[i + 1])
+            merge_sets(parents, row[i], row[i + 1])
     borders[-1] = True
-    return borders, row
-
+    return borders, [find_set(parents, set_number) for set_number in row]
 
-def number_of_elements_in_set(row: list[int], set_number: int) -> int:
-    count: int = 0
-    for i in row:
-        if i == set_number:
-            count += 1
-    return count
-
-
-def number_of_horizontal_borders_in_set(row: list[int], set_number: int, borders: list[bool]) -> int:
-    count: int = 0
-    for i in range(len(row)):
-        if row[i] == set_number and borders[i]:
-            count += 1
-    return count
 
-
-def generate_down_borders(row: list[int]) -> list[bool]:
+def generate_down_borders(row: list[int], rng: random.Random = random) -> list[bool]:
     borders: list[bool] = [False for _ in range(len(row))]
+    # a set has to keep at least one cell without a down border, so count cells left open in every set
+    open_cells: Counter[int] = Counter(row)
 
     for i in range(len(row)):
-        choice: bool = bool(random.randint(0, 1))
-        if choice and number_of_elements_in_set(row, row[i]) - \
-                number_of_horizontal_borders_in_set(row, row[i], borders) != 1:
+        choice: bool = bool(rng.randint(0, 1))
+        if choice and open_cells[row[i]] != 1:
             borders[i] = True
+            open_cells[row[i]] -= 1
     return borders
 
 
-def generate_labyrinth(width: int, height: int) -> tuple[list[list[bool]], list[list[bool]]]:
-    # initial setup
+def generate_rows(width: int, height: int,
+                  rng: random.Random = random) -> Iterator[tuple[list[bool], list[bool]]]:
+    # yields right and down borders of the labyrinth one row at a time, every row costs O(width)
     next_set: int = 1
-    matrix_right_borders = []
-    matrix_down_borders = []
 
     # create first line with no cells added to any set
     sets: list[int] = [0 for _ in range(width)]
@@ -65,19 +57,28 @@ def generate_labyrinth(width: int, height: int) -> tuple[list[list[bool]], list[
                 sets[col] = next_set
                 next_set += 1
         # step 3: add right borders
-        cur_right_borders, sets = generate_right_borders(sets)
-        matrix_right_borders.append(cur_right_borders)
+        right_borders, sets = generate_right_borders(sets, rng)
         # step 4: add down borders
-        matrix_down_borders.append(generate_down_borders(sets))
+        down_borders = generate_down_borders(sets, rng)
         if row != height - 1:  # not the last line
             for i in range(len(sets)):
-                if matrix_down_borders[row][i]:
+                if down_borders[i]:
                     sets[i] = 0
         else:
+            parents: dict[int, int] = {set_number: set_number for set_number in sets}
             for i in range(width):
-                matrix_down_borders[row][i] = True
-                if i != width - 1 and sets[i] != sets[i + 1]:
-                    matrix_right_borders[row][i] = False
-                    sets = merge_sets(sets, sets[i], sets[i + 1])
+                down_borders[i] = True
+                if i != width - 1 and find_set(parents, sets[i]) != find_set(parents, sets[i + 1]):
+                    right_borders[i] = False
+                    merge_sets(parents, sets[i], sets[i + 1])
+        yield right_borders, down_borders
 
+
+def generate_labyrinth(width: int, height: int,
+                       rng: random.Random = random) -> tuple[list[list[bool]], list[list[bool]]]:
+    matrix_right_borders = []
+    matrix_down_borders = []
+    for right_borders, down_borders in generate_rows(width, height, rng):
+        matrix_right_borders.append(right_borders)
+        matrix_down_borders.append(down_borders)
     return matrix_right_borders, matrix_down_borders
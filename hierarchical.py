@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import math
+from typing import Callable
+
+INFINITY = math.inf
+NEIGHBORS = [(d_row, d_col, math.sqrt(2) if d_row and d_col else 1)
+             for d_row in range(-1, 2) for d_col in range(-1, 2) if d_row or d_col]
+
+Cell = tuple[int, int]
+
+
+def get_octile_distance(cell: Cell, other: Cell) -> float:
+    d_row, d_col = abs(cell[0] - other[0]), abs(cell[1] - other[1])
+    return max(d_row, d_col) + (math.sqrt(2) - 1) * min(d_row, d_col)
+
+
+class ClusterGraph:
+    # abstract graph of hierarchical A* (HPA*): the field is cut into square clusters, the cells on both sides of
+    # every free stretch of a cluster border are the nodes, joined across the border and by their distances inside
+    # the cluster. A cluster is worked out when a query reaches it for the first time and again only after
+    # a wall edit next to it, so neither the whole field nor the unchanged clusters are ever searched again
+    def __init__(self, height: int, width: int, is_blocked: Callable[[int, int], bool], cluster_size=16):
+        self.height, self.width = height, width
+        self.is_blocked = is_blocked
+        self.cluster_size = cluster_size
+        # (cluster, cluster): crossings (cell of the first, cell of the second, cost), the first cluster is smaller
+        self.borders: dict[tuple[Cell, Cell], list[tuple[Cell, Cell, float]]] = {}
+        self.crossings: dict[Cell, dict[Cell, float]] = {}  # the border crossings of every node
+        self.edges: dict[Cell, dict[Cell, dict[Cell, float]]] = {}  # by cluster: node -> distances inside to nodes
+        self.order = itertools.count()
+        self.expansions = 0
+
+    def is_free(self, cell: Cell) -> bool:
+        return 0 <= cell[0] < self.height and 0 <= cell[1] < self.width and not self.is_blocked(*cell)
+
+    def get_cluster(self, cell: Cell) -> Cell:
+        return cell[0] // self.cluster_size, cell[1] // self.cluster_size
+
+    def get_bounds(self, cluster: Cell) -> tuple[int, int, int, int]:
+        top, left = cluster[0] * self.cluster_size, cluster[1] * self.cluster_size
+        return top, left, min(top + self.cluster_size, self.height), min(left + self.cluster_size, self.width)
+
+    def get_adjacent_clusters(self, cluster: Cell) -> list[Cell]:
+        return [(cluster[0] + d_row, cluster[1] + d_col) for d_row, d_col, _ in NEIGHBORS
+                if 0 <= (cluster[0] + d_row) * self.cluster_size < self.height
+                and 0 <= (cluster[1] + d_col) * self.cluster_size < self.width]
+
+    def get_border(self, cluster: Cell, other: Cell) -> list[tuple[Cell, Cell, float]]:
+        key = (cluster, other) if cluster < other else (other, cluster)
+        if key not in self.borders:
+            self.borders[key] = self.find_crossings(*key)
+            for cell, other_cell, cost in self.borders[key]:
+                self.crossings.setdefault(cell, {})[other_cell] = cost
+                self.crossings.setdefault(other_cell, {})[cell] = cost
+        return self.borders[key]
+
+    def find_crossings(self, cluster: Cell, other: Cell) -> list[tuple[Cell, Cell, float]]:
+        # a stretch of straight crossings is one entrance (two if it is long), cells of a stretch are neighbors
+        # along the border, so any of them stands for all. A diagonal crossing is an entrance of its own only
+        # if it is the sole way between its two cells, otherwise a straight crossing next to it covers it
+        top, left, bottom, right = self.get_bounds(cluster)
+        o_top, o_left, o_bottom, o_right = self.get_bounds(other)
+        straight, result = [], []
+        for row in range(max(top, o_top - 1), min(bottom, o_bottom + 1)):
+            for col in range(max(left, o_left - 1), min(right, o_right + 1)):
+                if not self.is_free((row, col)):
+                    continue
+                for d_row, d_col, cost in NEIGHBORS:
+                    cell = row + d_row, col + d_col
+                    if self.get_cluster(cell) != other or not self.is_free(cell):
+                        continue
+                    if d_row == 0 or d_col == 0:
+                        straight.append(((row, col), cell))
+                    elif not self.is_free((row, cell[1])) and not self.is_free((cell[0], col)):
+                        result.append(((row, col), cell, cost))
+        stretch = []
+        for crossing in straight + [None]:
+            if stretch and (crossing is None or get_octile_distance(stretch[-1][0], crossing[0]) != 1):
+                picked = [stretch[0], stretch[-1]] if len(stretch) > 5 else [stretch[len(stretch) // 2]]
+                result += [(cell, other_cell, 1) for cell, other_cell in picked]
+                stretch = []
+            if crossing is not None:
+                stretch.append(crossing)
+        return result
+
+    def get_edges(self, cluster: Cell) -> dict[Cell, dict[Cell, float]]:
+        if cluster not in self.edges:
+            nodes = set()
+            for other in self.get_adjacent_clusters(cluster):
+                for cell, other_cell, _ in self.get_border(cluster, other):
+                    nodes.add(cell if self.get_cluster(cell) == cluster else other_cell)
+            edges = {}
+            for node in nodes:
+                distances, _ = self.search_cluster(node)
+                edges[node] = {other: distances[other] for other in nodes if other != node and other in distances}
+            self.edges[cluster] = edges
+        return self.edges[cluster]
+
+    def search_cluster(self, source: Cell, target: Cell = None,
+                       bounds: tuple[int, int, int, int] = None) -> tuple[dict[Cell, float], dict[Cell, Cell]]:
+        # Dijkstra that does not leave the cluster of source (or bounds), stops at target if it is given
+        top, left, bottom, right = bounds or self.get_bounds(self.get_cluster(source))
+        distances, parents = {source: 0}, {}
+        heap = [(0, next(self.order), source)]
+        while heap:
+            distance, _, cell = heapq.heappop(heap)
+            if cell == target:
+                break
+            if distance > distances[cell]:
+                continue
+            for d_row, d_col, cost in NEIGHBORS:
+                n = cell[0] + d_row, cell[1] + d_col
+                if top <= n[0] < bottom and left <= n[1] < right and not self.is_blocked(*n) \
+                        and distance + cost < distances.get(n, INFINITY):
+                    distances[n], parents[n] = distance + cost, cell
+                    heapq.heappush(heap, (distance + cost, next(self.order), n))
+        return distances, parents
+
+    def update_cell(self, row: int, col: int) -> None:
+        # the cell can change a crossing between any two clusters next to it and the distances inside them
+        clusters = {self.get_cluster((row + d_row, col + d_col)) for d_row in range(-1, 2) for d_col in range(-1, 2)
+                    if 0 <= row + d_row < self.height and 0 <= col + d_col < self.width}
+        for cluster in clusters:
+            for other in clusters:
+                if cluster < other:
+                    for cell, other_cell, _ in self.borders.pop((cluster, other), []):
+                        self.crossings.get(cell, {}).pop(other_cell, None)
+                        self.crossings.get(other_cell, {}).pop(cell, None)
+            self.edges.pop(cluster, None)
+
+    def find_path(self, start: Cell, goal: Cell) -> tuple[list[Cell], float]:
+        # A* over the nodes with start and goal joined to the nodes of their clusters, then every step between
+        # two nodes is searched again inside its cluster; the path is empty and the cost None if there is no path
+        self.expansions = 0
+        if not self.is_free(start) or not self.is_free(goal):
+            return [], None
+        if start == goal:
+            return [start], 0
+        start_edges = self.get_local_edges(start)
+        goal_edges = self.get_local_edges(goal)
+        lengths, parents = {start: 0}, {}
+        heap = [(get_octile_distance(start, goal), next(self.order), start)]
+        # entrances make detours between near cells, so a goal in the same or the next cluster is also searched for
+        # directly inside the two clusters, and the abstract search only has to beat that
+        start_cluster, goal_cluster = self.get_cluster(start), self.get_cluster(goal)
+        near_path, near_length = [], INFINITY
+        if max(abs(start_cluster[0] - goal_cluster[0]), abs(start_cluster[1] - goal_cluster[1])) <= 1:
+            near_path, near_length = self.search_near(start, goal)
+        while heap:
+            length, _, node = heapq.heappop(heap)
+            if length >= near_length:
+                return near_path, near_length
+            if node == goal:
+                return self.refine(start, goal, parents), lengths[goal]
+            self.expansions += 1
+            neighbors = dict(start_edges if node == start else self.get_edges(self.get_cluster(node)).get(node, {}))
+            neighbors.update(self.crossings.get(node, {}))
+            if node in goal_edges:
+                neighbors[goal] = goal_edges[node]
+            for n, cost in neighbors.items():
+                if lengths[node] + cost < lengths.get(n, INFINITY):
+                    lengths[n], parents[n] = lengths[node] + cost, node
+                    heapq.heappush(heap, (lengths[n] + get_octile_distance(n, goal), next(self.order), n))
+        return near_path, near_length if near_path else None
+
+    def search_near(self, start: Cell, goal: Cell) -> tuple[list[Cell], float]:
+        top, left, bottom, right = self.get_bounds(self.get_cluster(start))
+        o_top, o_left, o_bottom, o_right = self.get_bounds(self.get_cluster(goal))
+        distances, parents = self.search_cluster(
+            start, goal, (min(top, o_top), min(left, o_left), max(bottom, o_bottom), max(right, o_right)))
+        if goal not in distances:
+            return [], INFINITY
+        path = [goal]
+        while path[-1] != start:
+            path.append(parents[path[-1]])
+        return path[::-1], distances[goal]
+
+    def get_local_edges(self, cell: Cell) -> dict[Cell, float]:
+        # distances from a cell to the nodes of its cluster, a cell that is a node also keeps its crossings
+        self.get_edges(self.get_cluster(cell))
+        distances, _ = self.search_cluster(cell)
+        return {node: distances[node] for node in self.edges[self.get_cluster(cell)] if node in distances}
+
+    def refine(self, start: Cell, goal: Cell, parents: dict[Cell, Cell]) -> list[Cell]:
+        nodes = [goal]
+        while nodes[-1] != start:
+            nodes.append(parents[nodes[-1]])
+        nodes.reverse()
+        path = [start]
+        for node, n in zip(nodes, nodes[1:]):
+            if self.get_cluster(node) != self.get_cluster(n):  # a border crossing, the cells are neighbors
+                path.append(n)
+                continue
+            _, cell_parents = self.search_cluster(node, n)
+            part = [n]
+            while part[-1] != node:
+                part.append(cell_parents[part[-1]])
+            path += part[-2::-1]
+        return path
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import math
+from typing import Callable
+
+INFINITY = math.inf
+
+
+class DStarLite:
+    # incremental search (D* Lite) rooted at the goal: g and rhs values are kept between wall edits and start moves,
+    # so after a change only the cells whose distance to the goal changed are expanded again
+    def __init__(self, start, goal, is_inbounds: Callable, is_blocked: Callable):
+        self.start, self.goal = start, goal
+        self.last_start = start
+        self.is_inbounds, self.is_blocked = is_inbounds, is_blocked
+        self.km = 0  # heuristic offset accumulated by start moves, keeps old queue keys valid
+        self.g: dict = {}
+        self.rhs: dict = {goal: 0}
+        self.open_keys: dict = {}
+        self.open_heap: list = []
+        self.open_order = itertools.count()
+        self.expansions = 0
+        self.push(goal)
+
+    def cost(self, point, other) -> float:
+        if self.is_blocked(point) or self.is_blocked(other):
+            return INFINITY
+        return math.sqrt(2) if point.row != other.row and point.col != other.col else 1
+
+    def get_neighbors(self, point) -> list:
+        return [n for n in point.get_neighbors() if self.is_inbounds(n)]
+
+    def calculate_key(self, point) -> tuple[float, float]:
+        value = min(self.g.get(point, INFINITY), self.rhs.get(point, INFINITY))
+        return value + self.start.get_octile_distance(point) + self.km, value
+
+    def push(self, point) -> None:
+        # lazy deletion: a point is in the queue only while open_keys holds the key of its heap entry
+        key = self.calculate_key(point)
+        self.open_keys[point] = key
+        heapq.heappush(self.open_heap, (key, next(self.open_order), point))
+
+    def top(self):
+        while self.open_heap:
+            key, _, point = self.open_heap[0]
+            if self.open_keys.get(point) == key:
+                return key, point
+            heapq.heappop(self.open_heap)
+        return (INFINITY, INFINITY), None
+
+    def update_vertex(self, point) -> None:
+        if self.g.get(point, INFINITY) != self.rhs.get(point, INFINITY):
+            self.push(point)
+        else:
+            self.open_keys.pop(point, None)
+
+    def best_rhs(self, point) -> float:
+        return min((self.cost(point, n) + self.g.get(n, INFINITY) for n in self.get_neighbors(point)),
+                   default=INFINITY)
+
+    def is_planned(self) -> bool:
+        key, _ = self.top()
+        return not key < self.calculate_key(self.start) \
+            and self.rhs.get(self.start, INFINITY) == self.g.get(self.start, INFINITY)
+
+    def step(self):
+        # one iteration of ComputeShortestPath, returns the expanded point or None if the path is up to date
+        if self.is_planned():
+            return None
+        old_key, point = self.top()
+        new_key = self.calculate_key(point)
+        if old_key < new_key:
+            self.push(point)
+        elif self.g.get(point, INFINITY) > self.rhs.get(point, INFINITY):
+            self.g[point] = self.rhs[point]
+            del self.open_keys[point]
+            for n in self.get_neighbors(point):
+                if n != self.goal:
+                    self.rhs[n] = min(self.rhs.get(n, INFINITY), self.cost(n, point) + self.g[point])
+                    self.update_vertex(n)
+        else:
+            old_g = self.g.get(point, INFINITY)
+            self.g[point] = INFINITY
+            for n in self.get_neighbors(point) + [point]:
+                if n != self.goal and (n == point or self.rhs.get(n, INFINITY) == self.cost(n, point) + old_g):
+                    self.rhs[n] = self.best_rhs(n)
+                self.update_vertex(n)
+        self.expansions += 1
+        return point
+
+    def plan(self) -> None:
+        while self.step() is not None:
+            pass
+
+    def update_cell(self, point) -> None:
+        # the cell became a wall or was cleared, so the cost of every edge around it changed
+        for n in self.get_neighbors(point) + [point]:
+            if n != self.goal:
+                self.rhs[n] = self.best_rhs(n)
+            self.update_vertex(n)
+
+    def move_start(self, start) -> None:
+        self.km += self.last_start.get_octile_distance(start)
+        self.start = self.last_start = start
+
+    def get_cost(self) -> float:
+        return self.g.get(self.start, INFINITY)
+
+    def get_path(self) -> list:
+        # follows the cheapest neighbor from the start, empty if the goal can not be reached
+        if self.get_cost() == INFINITY:
+            return []
+        path = [self.start]
+        visited = {self.start}
+        while path[-1] != self.goal:
+            point = min(self.get_neighbors(path[-1]), key=lambda n: self.cost(path[-1], n) + self.g.get(n, INFINITY))
+            if point in visited:
+                return []
+            visited.add(point)
+            path.append(point)
+        return path
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import struct
+from typing import BinaryIO
+
+import numpy
+
+from bit_grid import BitGrid
+from test import Marker, Maze, Point
+
+# file layout: header, then the wall plane packed 8 cells per byte in row-major order (numpy.packbits order)
+MAGIC = b"WAMZ"
+VERSION = 1
+HEADER = struct.Struct("<4sBBxxIIIIIIQ")  # magic, version, flags, height, width, start, goal, seed
+HAS_SEED = 1
+
+
+class MappedGrid(BitGrid):
+    # compact field whose walls are read lazily from the packed plane of a memory-mapped maze file;
+    # the cells that differ from it after loading are kept in self.changed, the file itself is never written
+    def __init__(self, plane: numpy.ndarray, height: int, width: int):
+        self.height, self.width = height, width
+        self.plane = plane
+        self.changed: dict[tuple[int, int], int] = {}
+        self.colors: dict[tuple[int, int], tuple[int, int, int]] = {}
+
+    @property
+    def cells(self) -> numpy.ndarray:
+        # materializes the whole field, only for code that needs it as one array
+        walls = numpy.unpackbits(self.plane, count=self.height * self.width).reshape(self.height, self.width)
+        cells = numpy.where(walls, Marker.wall.flag, Marker.empty.flag).astype(numpy.uint8)
+        for (row, col), flags in self.changed.items():
+            cells[row, col] = flags
+        return cells
+
+    def is_wall_in_file(self, row: int, col: int) -> bool:
+        index = row * self.width + col
+        return int(self.plane[index >> 3]) >> (7 - (index & 7)) & 1 == 1
+
+    def get_flags(self, row: int, col: int) -> int:
+        flags = self.changed.get((row, col))
+        if flags is None:
+            return Marker.wall.flag if self.is_wall_in_file(row, col) else Marker.empty.flag
+        return flags
+
+    def set_flags(self, row: int, col: int, flags: int) -> None:
+        # a cell that is back to what the file says is read from the file again, so searches do not pile up here
+        if flags == (Marker.wall.flag if self.is_wall_in_file(row, col) else Marker.empty.flag):
+            self.changed.pop((row, col), None)
+        else:
+            self.changed[row, col] = flags
+
+    def set_walls(self, walls: numpy.ndarray, top=0) -> None:
+        for row, col in zip(*numpy.nonzero(walls)):
+            self.set_markers(int(row) + top, int(col), [Marker.wall])
+
+
+def get_walls(maze: Maze) -> numpy.ndarray:
+    if maze.compact:
+        return maze.map.cells & Marker.wall.flag != 0
+    return numpy.array([[Marker.wall in point.markers for point in row] for row in maze.map], dtype=bool)
+
+
+def write_header(file: BinaryIO, height: int, width: int, start: Point, goal: Point, seed: int = None) -> None:
+    file.write(HEADER.pack(MAGIC, VERSION, HAS_SEED if seed is not None else 0, height, width,
+                           start.row, start.col, goal.row, goal.col, seed or 0))
+
+
+def save_maze(maze: Maze, path: str) -> None:
+    with open(path, "wb") as file:
+        write_header(file, maze.height, maze.width, maze.start, maze.goal, maze.seed)
+        file.write(numpy.packbits(get_walls(maze), axis=None).tobytes())
+
+
+def read_header(path: str) -> tuple[int, int, Point, Point, int]:
+    with open(path, "rb") as file:
+        magic, version, flags, height, width, start_row, start_col, goal_row, goal_col, seed = \
+            HEADER.unpack(file.read(HEADER.size))
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a maze file of version {VERSION}")
+    return height, width, Point(start_row, start_col), Point(goal_row, goal_col), \
+        seed if flags & HAS_SEED else None
+
+
+def load_maze(path: str) -> Maze:
+    # the wall plane is memory-mapped read-only, so pages are read only when the solver touches them
+    # and several processes loading the same file share it
+    height, width, start, goal, seed = read_header(path)
+    plane = numpy.memmap(path, dtype=numpy.uint8, mode="r", offset=HEADER.size, shape=((height * width + 7) // 8,))
+    maze = Maze(height, width, compact=True, seed=seed, grid=MappedGrid(plane, height, width))
+    maze.set_endpoints(start, goal)
+    return maze
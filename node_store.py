@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import heapq
+import math
+from array import array
+from typing import Callable
+
+UNSEEN, OPEN, CLOSED = 0, 1, 2
+
+
+class NodeStore:
+    # A* state of every cell in parallel flat arrays indexed by the cell id; the field is surrounded by a border
+    # of blocked cells, so the neighbors of a cell are its id plus the precomputed offsets, without bounds checks
+    def __init__(self, height: int, width: int, is_wall: Callable[[int, int], bool] = None,
+                 blocked: bytearray = None):
+        # the walls come either from is_wall, cell by cell, or ready in blocked (see bit_grid.pad_walls)
+        self.height, self.width = height, width
+        self.stride = width + 2
+        size = (height + 2) * self.stride
+        self.g = array('d', [math.inf]) * size
+        self.parent = array('q', [-1]) * size
+        self.order = array('q', [0]) * size  # insertion number in the open set, used to break ties
+        self.state = bytearray(size)
+        if blocked is not None:
+            self.blocked = bytearray(blocked)
+        else:
+            self.blocked = bytearray(b'\x01') * size
+            for row in range(height):
+                for col in range(width):
+                    self.blocked[self.get_id(row, col)] = is_wall(row, col)
+        # same order as Point.get_neighbors, so ties break the same way as with PathPoint
+        self.offsets = [(d_row * self.stride + d_col, math.sqrt(2) if d_row and d_col else 1)
+                        for d_row in range(-1, 2) for d_col in range(-1, 2) if d_row or d_col]
+        self.touched = array('q')  # ids with a state, the only ones reset by the next search
+        self.open_heap: list[tuple[float, int, int]] = []
+        self.open_count = 0
+        self.next_order = 0
+        self.start, self.goal = -1, -1
+
+    def get_id(self, row: int, col: int) -> int:
+        return (row + 1) * self.stride + col + 1
+
+    def get_cell(self, node: int) -> tuple[int, int]:
+        row, col = divmod(node, self.stride)
+        return row - 1, col - 1
+
+    def set_blocked(self, row: int, col: int, is_blocked: bool) -> None:
+        self.blocked[self.get_id(row, col)] = is_blocked
+
+    def estimate(self, node: int) -> float:
+        # octile distance to the goal, the same float as Point.get_octile_distance
+        d_row = abs(node // self.stride - self.goal // self.stride)
+        d_col = abs(node % self.stride - self.goal % self.stride)
+        return max(d_row, d_col) + (math.sqrt(2) - 1) * min(d_row, d_col)
+
+    def reset(self) -> None:
+        for node in self.touched:
+            self.g[node] = math.inf
+            self.parent[node] = -1
+            self.state[node] = UNSEEN
+        self.touched = array('q')
+        self.open_heap = []
+        self.open_count = 0
+        self.next_order = 0
+        self.start, self.goal = -1, -1
+
+    def begin(self, start: tuple[int, int], goal: tuple[int, int]) -> None:
+        self.reset()
+        self.start, self.goal = self.get_id(*start), self.get_id(*goal)
+        self.g[self.start] = 0
+        self.add(self.start)
+
+    def add(self, node: int) -> None:
+        self.state[node] = OPEN
+        self.order[node] = self.next_order
+        self.next_order += 1
+        self.open_count += 1
+        self.touched.append(node)
+        self.push(node)
+
+    def push(self, node: int) -> None:
+        # outdated entries stay in the heap and are skipped by pop_closest
+        heapq.heappush(self.open_heap, (self.g[node] + self.estimate(node), self.order[node], node))
+
+    def pop_closest(self) -> int:
+        # -1 if the open set is empty
+        while self.open_heap:
+            distance, _, node = heapq.heappop(self.open_heap)
+            if self.state[node] == OPEN and distance == self.g[node] + self.estimate(node):
+                self.state[node] = CLOSED
+                self.open_count -= 1
+                return node
+        return -1
+
+    def mark_found(self, node: int) -> None:
+        # the goal is not put into the open set, it only has to be reset with the rest
+        self.state[node] = CLOSED
+        self.touched.append(node)
+
+    def expand(self, node: int) -> tuple[list[int], list[int]]:
+        # relaxes the neighbors of a node taken by pop_closest, returns the ones seen for the first time
+        # (the goal among them is marked found instead of opened) and the open ones that got shorter
+        length = self.g[node]
+        seen, shortened = [], []
+        for offset, cost in self.offsets:
+            n = node + offset
+            state = self.state[n]
+            if self.blocked[n] or state == CLOSED:  # the start is closed by the first step and never entered again
+                continue
+            if state == OPEN:
+                if self.g[n] > length + cost:
+                    self.g[n], self.parent[n] = length + cost, node
+                    self.push(n)
+                    shortened.append(n)
+                continue
+            self.g[n], self.parent[n] = length + cost, node
+            if n == self.goal:
+                self.mark_found(n)
+            else:
+                self.add(n)
+            seen.append(n)
+        return seen, shortened
+
+    def get_path(self) -> list[tuple[int, int]]:
+        # cells from the start to the found goal
+        path, node = [], self.goal
+        while node != -1:
+            path.append(self.get_cell(node))
+            node = self.parent[node]
+        return path[::-1]
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import numpy
+import pygame
+
+from test import MARKER_COLORS, Marker
+
+BACKGROUND = 0
+HEAT_BASE = len(MARKER_COLORS) + 1  # the marker colors go right after the background, in their order
+HEAT_LEVELS = 256
+PATH_BASE = HEAT_BASE + HEAT_LEVELS  # the colors of the found path, one per cell of it
+
+
+def get_flag_states() -> numpy.ndarray:
+    # state of every possible BitGrid cell byte, the first marker of MARKER_COLORS that is set wins
+    states = numpy.full(256, BACKGROUND, dtype=numpy.int32)
+    for flags in range(256):
+        for index, (marker, _) in enumerate(MARKER_COLORS):
+            if flags & marker.flag:
+                states[flags] = index + 1
+                break
+    return states
+
+
+class PaletteRenderer:
+    # the field as an array of palette indices, one per cell: a frame is a palette lookup into an RGB array,
+    # one upload of it with surfarray and one scale to the viewport. The path gradient is a part of the palette,
+    # so its animation rotates that part instead of recoloring the cells
+    def __init__(self, height: int, width: int):
+        self.height, self.width = height, width
+        self.states = numpy.zeros((height, width), dtype=numpy.int32)
+        self.palette = numpy.zeros((PATH_BASE, 3), dtype=numpy.uint8)
+        for index, (_, color) in enumerate(MARKER_COLORS):
+            self.palette[index + 1] = color
+        heat = numpy.arange(HEAT_LEVELS) / (HEAT_LEVELS - 1)
+        self.palette[HEAT_BASE:PATH_BASE, 0] = 255
+        self.palette[HEAT_BASE:PATH_BASE, 1] = 255 - (200 * heat).astype(int)
+        self.palette[HEAT_BASE:PATH_BASE, 2] = 255 - (255 * heat).astype(int)
+        self.path_indices: dict[tuple[int, int], int] = {}
+        self.background: tuple[int, int, int] = None
+        self.cells_surface = pygame.Surface((width, height))  # one pixel per cell, scaled on the way to the display
+        self.is_changed = True  # the picture differs from the last upload
+
+    def set_background(self, color: tuple[int, int, int]) -> None:
+        if self.background != color:
+            self.background = color
+            self.palette[BACKGROUND] = color
+            self.is_changed = True
+
+    def get_state(self, row: int, col: int, markers, heat: float = None) -> int:
+        # same choice as Maze.get_cell_color
+        if Marker.custom in markers:
+            return self.path_indices.get((row, col), BACKGROUND)
+        for index, (marker, _) in enumerate(MARKER_COLORS):
+            if marker in markers:
+                return index + 1
+        if heat is not None:
+            return HEAT_BASE + int(heat * (HEAT_LEVELS - 1))
+        return BACKGROUND
+
+    def set_cell(self, row: int, col: int, markers, heat: float = None) -> None:
+        self.states[row, col] = self.get_state(row, col, markers, heat)
+        self.is_changed = True
+
+    def set_row(self, row: int, states: list[int]) -> None:
+        self.states[row] = states
+        self.is_changed = True
+
+    def set_flag_cells(self, cells: numpy.ndarray, custom_cells) -> None:
+        # every cell at once from the bytes of a BitGrid, the cells with a custom color are put back over them
+        self.states = get_flag_states()[cells]
+        for row, col in custom_cells:
+            self.states[row, col] = self.path_indices.get((row, col), BACKGROUND)
+        self.is_changed = True
+
+    def set_path(self, cells: list[tuple[int, int]], colors: list[tuple[int, int, int]]) -> None:
+        self.palette = numpy.concatenate([self.palette[:PATH_BASE], numpy.array(colors, dtype=numpy.uint8)])
+        self.path_indices = {cell: PATH_BASE + index for index, cell in enumerate(cells)}
+        for (row, col), index in self.path_indices.items():
+            self.states[row, col] = index
+        self.is_changed = True
+
+    def rotate_path(self) -> None:
+        # every path cell takes the color of the one before it, the first one that of the last, like shift_gradient
+        self.palette[PATH_BASE:] = numpy.roll(self.palette[PATH_BASE:], 1, axis=0)
+        self.is_changed = True
+
+    def draw(self, surface: pygame.Surface) -> None:
+        # take is several times faster than fancy indexing for a lookup like this
+        pygame.surfarray.blit_array(self.cells_surface, self.palette.take(self.states, axis=0).swapaxes(0, 1))
+        pygame.transform.scale(self.cells_surface, surface.get_size(), surface)
+        self.is_changed = False
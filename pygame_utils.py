@@ -1,33 +1,81 @@
+from collections import OrderedDict
+
 import pygame
 
+fonts: dict[tuple[str, int], pygame.font.Font] = {}
+
+
+def get_font(name="monospace", size=18) -> pygame.font.Font:
+    # SysFont looks the font up among all the installed ones, so every font is created only once
+    if (name, size) not in fonts:
+        pygame.font.init()
+        fonts[name, size] = pygame.font.SysFont(name, size)
+    return fonts[name, size]
+
+
+class SurfaceCache:
+    # rendered surfaces by key, the least recently used ones are dropped when there are more than max_size
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self.surfaces: OrderedDict[tuple, pygame.Surface] = OrderedDict()
+
+    def get(self, key, render) -> pygame.Surface:
+        if key in self.surfaces:
+            self.surfaces.move_to_end(key)
+            return self.surfaces[key]
+        surface = self.surfaces[key] = render()
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+        return surface
+
+
+word_cache = SurfaceCache()
+text_cache = SurfaceCache()
+
+
+def render_word(font: pygame.font.Font, font_key, word: str, color) -> pygame.Surface:
+    return word_cache.get((word, tuple(color), font_key), lambda: font.render(word, 1, color))
+
 
 class Text:
-    def __init__(self, text):
+    def __init__(self, text, font_name="monospace", font_size=18):
         self.text = text
-        pygame.font.init()
-        self.myfont = pygame.font.SysFont("monospace", 18)
+        self.font_key = font_name, font_size
+        self.myfont = get_font(font_name, font_size)
         self.size = 0, 0
 
-    def blit_text(self, surface, pos, color=pygame.Color('black')):
+    def layout_text(self, max_width, left, color) -> tuple[pygame.Surface, tuple[int, int]]:
+        # renders the whole wrapped text into one surface, as if it was drawn at x = left on a surface max_width wide
         words = [word.split(' ') for word in self.text.splitlines()]  # 2D array where each row is a list of words.
         space = self.myfont.size(' ')[0]  # The width of a space.
-        max_width, max_height = surface.get_size()
-        x, y = pos
+        x, y = left, 0
         width = 0
+        placed = []
         for line in words:
             for word in line:
-                word_surface = self.myfont.render(word, 1, color)
+                word_surface = render_word(self.myfont, self.font_key, word, color)
                 word_width, word_height = word_surface.get_size()
                 if x + word_width >= max_width:
-                    width = max(x - pos[0], width)
-                    x = pos[0]  # Reset the x.
+                    width = max(x - left, width)
+                    x = left  # Reset the x.
                     y += word_height  # Start on new row.
-                surface.blit(word_surface, (x, y))
+                # words never overlap, so they are copied into the transparent block as they are
+                placed.append((word_surface, (x - left, y), None, pygame.BLEND_RGBA_MAX))
                 x += word_width + space
-                width = max(x - pos[0], width)
-            x = pos[0]  # Reset the x.
+                width = max(x - left, width)
+            x = left  # Reset the x.
             y += word_height  # Start on new row.
-        return width, y - pos[1]
+        block = pygame.Surface((max([pos[0] + word.get_width() for word, pos, *_ in placed] + [1]),
+                                max([pos[1] + word.get_height() for word, pos, *_ in placed] + [1])), pygame.SRCALPHA)
+        block.blits(placed)
+        return block, (width, y)
+
+    def blit_text(self, surface, pos, color=pygame.Color('black')):
+        # the layout is made again only when the text, its color or the place for it change
+        key = (str(self.text), tuple(color), self.font_key, pos[0], surface.get_width())
+        block, size = text_cache.get(key, lambda: self.layout_text(surface.get_width(), pos[0], color))
+        surface.blit(block, pos)
+        return size
 
     def draw_on_screen(self, display: pygame.Surface, color, params):
         self.size = self.blit_text(display, (params[0], params[1]))
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import json
+from typing import TextIO
+
+
+class SearchStats:
+    # counters of the current search and timings of the steps and frames that made it, see Maze.stats;
+    # with export_file set every step is written to it as a line of JSON
+    def __init__(self, export_file: TextIO = None):
+        self.export_file = export_file
+        self.reset()
+
+    def reset(self) -> None:
+        self.steps = 0
+        self.expansions = 0
+        self.open_size = 0
+        self.peak_open_size = 0
+        self.reparents = 0  # PathPoint.change_parent calls
+        self.step_time = 0.0  # seconds, of the last step
+        self.total_step_time = 0.0
+        self.draws = 0
+        self.draw_time = 0.0  # seconds, of the last draw_on_screen
+        self.total_draw_time = 0.0
+
+    def record_step(self, elapsed: float, open_size: int) -> None:
+        self.steps += 1
+        self.step_time = elapsed
+        self.total_step_time += elapsed
+        self.open_size = open_size
+        self.peak_open_size = max(self.peak_open_size, open_size)
+        if self.export_file is not None:
+            self.export_file.write(json.dumps(self.to_dict()) + "\n")
+
+    def record_draw(self, elapsed: float) -> None:
+        self.draws += 1
+        self.draw_time = elapsed
+        self.total_draw_time += elapsed
+
+    def to_dict(self) -> dict:
+        return {
+            "step": self.steps,
+            "expansions": self.expansions,
+            "open_size": self.open_size,
+            "peak_open_size": self.peak_open_size,
+            "reparents": self.reparents,
+            "step_time": self.step_time,
+            "total_step_time": self.total_step_time,
+            "draws": self.draws,
+            "draw_time": self.draw_time,
+            "total_draw_time": self.total_draw_time,
+        }
+
+    def format(self) -> str:
+        return "\n".join([
+            f"Шагов: {self.steps}, {self.step_time * 1000:.2f} мс",
+            f"Всего на шаги: {self.total_step_time * 1000:.1f} мс",
+            f"Отрисовка: {self.draw_time * 1000:.2f} мс",
+            f"Раскрыто: {self.expansions}",
+            f"Открыто: {self.open_size}, макс. {self.peak_open_size}",
+            f"Смен родителя: {self.reparents}",
+        ])
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import os
+import struct
+from typing import BinaryIO
+
+from test import Marker
+
+# file layout: header, then fixed-size records, one per search step, so step n is at a known offset
+MAGIC = b"WATR"
+VERSION = 1
+HEADER = struct.Struct("<4sBxxxII")  # magic, version, height, width
+RECORD = struct.Struct("<BIBB")  # kind, cell (row * width + col), added and re-parented neighbors of an expansion
+EXPANSION, PATH, RESTART = 0, 1, 2
+# bit i of a neighbor mask is the i-th direction, the same order as Point.get_neighbors
+DIRECTIONS = [(d_row, d_col) for d_row in range(-1, 2) for d_col in range(-1, 2) if d_row or d_col]
+MASK_DIRECTIONS = [[direction for index, direction in enumerate(DIRECTIONS) if mask >> index & 1]
+                   for mask in range(256)]
+CHUNK = 4096  # records read at once by TraceReplay
+
+Cell = tuple[int, int]
+
+
+class TraceWriter:
+    # streams the steps of Maze.find_path and Maze.backtrack_path to a file, 7 bytes a step; see Maze.trace
+    def __init__(self, file: BinaryIO, height: int, width: int):
+        self.file = file
+        self.width = width
+        self.file.write(HEADER.pack(MAGIC, VERSION, height, width))
+
+    @classmethod
+    def open(cls, path: str, height: int, width: int) -> TraceWriter:
+        return cls(open(path, "wb"), height, width)
+
+    def get_mask(self, cell: Cell, neighbors: list[Cell]) -> int:
+        mask = 0
+        for row, col in neighbors:
+            mask |= 1 << DIRECTIONS.index((row - cell[0], col - cell[1]))
+        return mask
+
+    def write_expansion(self, cell: Cell, added: list[Cell], reparented: list[Cell]) -> None:
+        self.file.write(RECORD.pack(EXPANSION, cell[0] * self.width + cell[1],
+                                    self.get_mask(cell, added), self.get_mask(cell, reparented)))
+
+    def write_path(self, cell: Cell) -> None:
+        self.file.write(RECORD.pack(PATH, cell[0] * self.width + cell[1], 0, 0))
+
+    def write_restart(self) -> None:
+        # the search was thrown away, the cells it marked are cleared
+        self.file.write(RECORD.pack(RESTART, 0, 0, 0))
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class TraceReplay:
+    # shows a recorded trace on a maze of the same size without searching: advance animates it step by step,
+    # seek jumps to any step. Records are read from the file in chunks only when they are reached
+    def __init__(self, maze, path: str):
+        self.maze = maze
+        self.file = open(path, "rb")
+        magic, version, height, width = HEADER.unpack(self.file.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a search trace of version {VERSION}")
+        if (height, width) != (maze.height, maze.width):
+            raise ValueError(f"{path} is a trace of a {height}x{width} maze, not of {maze.height}x{maze.width}")
+        self.width = width
+        self.step_count = (os.path.getsize(path) - HEADER.size) // RECORD.size
+        self.position = 0  # steps shown
+        self.chunk: list[tuple[int, int, int, int]] = []
+        self.chunk_start = 0
+        self.touched = set()  # points marked by the replay, cleared by a restart or a backward seek
+        self.closest = None
+
+    @property
+    def is_finished(self) -> bool:
+        return self.position >= self.step_count
+
+    def get_records(self, index: int, count: int) -> list[tuple[int, int, int, int]]:
+        # up to count records from index, not past the chunk that holds it
+        if not self.chunk_start <= index < self.chunk_start + len(self.chunk):
+            self.file.seek(HEADER.size + index * RECORD.size)
+            self.chunk = list(RECORD.iter_unpack(self.file.read(CHUNK * RECORD.size)))
+            self.chunk_start = index
+        return self.chunk[index - self.chunk_start:index - self.chunk_start + count]
+
+    def get_point(self, cell_id: int):
+        return self.maze.map[cell_id // self.width][cell_id % self.width]
+
+    def mark(self, point, marker: Marker) -> None:
+        self.maze.add_marker(point, marker)
+        self.touched.add(point)
+
+    def clear(self) -> None:
+        self.maze.clear_search_markers(self.touched)
+        self.touched = set()
+        self.closest = None
+
+    def apply(self, record: tuple[int, int, int, int]) -> None:
+        # the same markers as the recorded step put
+        kind, cell_id, added, reparented = record
+        if kind == RESTART:
+            self.clear()
+            return
+        point = self.get_point(cell_id)
+        if kind == PATH:
+            self.mark(point, Marker.confirmed)
+            return
+        if self.closest is not None:
+            self.maze.remove_if_marker(self.closest, Marker.current_closest)
+        self.closest = point
+        self.mark(point, Marker.current_closest)
+        for d_row, d_col in MASK_DIRECTIONS[added]:
+            n = self.maze.map[point.row + d_row][point.col + d_col]
+            if n != self.maze.goal:  # the search does not mark the goal it found
+                self.mark(n, Marker.path)
+        if not added and not reparented:
+            self.mark(point, Marker.wrong)
+
+    def advance(self, count=1) -> int:
+        # shows the next count steps, returns how many there were
+        count = min(count, self.step_count - self.position)
+        end = self.position + count
+        while self.position < end:
+            records = self.get_records(self.position, end - self.position)
+            for record in records:
+                self.apply(record)
+            self.position += len(records)
+        return count
+
+    def seek(self, step: int) -> None:
+        # a step before the current one is reached by showing the trace again from its start
+        step = max(0, min(step, self.step_count))
+        if step < self.position:
+            self.clear()
+            self.position = 0
+        self.advance(step - self.position)
+
+    def close(self) -> None:
+        self.file.close()
@@ -1,11 +1,22 @@
 from __future__ import annotations
 
+import heapq
+import itertools
 import math
 
 import pygame
 import random
+import time
+from collections import OrderedDict, deque
 from enum import Enum
 from eller_algorithm import generate_labyrinth
+from background_solver import BackgroundSolver, SearchSnapshot
+from connectivity import Components
+from distance_field import DistanceField
+from hierarchical import ClusterGraph
+from incremental_search import DStarLite
+from node_store import NodeStore
+from search_stats import SearchStats
 
 
 def add_colors(color1: tuple[int, int, int], color2: tuple[int, int, int], subtract: bool = False) -> tuple[
@@ -29,6 +40,35 @@ class Marker(Enum):
     def __str__(self):
         return str(self.name)
 
+    @property
+    def flag(self) -> int:
+        # bit of the marker in a compact grid cell, custom is stored apart from the bits with its color
+        return 1 << self.value if self.value < 8 else 0
+
+
+# colors of the cell markers, the first one a cell has is drawn; custom cells have their own color
+MARKER_COLORS = [
+    (Marker.start, (255, 0, 0)),
+    (Marker.goal, (0, 255, 0)),
+    (Marker.wrong, (255, 0, 255)),
+    (Marker.confirmed, (0, 255, 255)),
+    (Marker.current_closest, (0x6A, 0x0D, 0xAD)),
+    (Marker.path, (255, 255, 0)),
+    (Marker.wall, (0, 0, 0)),
+]
+# markers a search and its path put on cells, everything else on a cell was drawn by the user
+SEARCH_MARKERS = (Marker.path, Marker.confirmed, Marker.wrong, Marker.current_closest, Marker.custom)
+
+
+class SearchStrategy(Enum):
+    astar = "A*"
+    jps = "JPS"
+    bidirectional = "A* с двух сторон"
+    hierarchical = "HPA*"
+
+    def __str__(self):
+        return str(self.value)
+
 
 class Point:
     def __init__(self, row, col, markers: list[Marker] = []):
@@ -39,9 +79,16 @@ class Point:
     def get_manh_distance(self, goal):
         return abs(goal.row - self.row) + abs(goal.col - self.col)
 
+    def get_octile_distance(self, goal):
+        d_row, d_col = abs(goal.row - self.row), abs(goal.col - self.col)
+        return max(d_row, d_col) + (math.sqrt(2) - 1) * min(d_row, d_col)
+
     def __eq__(self, other):
         return self.row == other.row and self.col == other.col
 
+    def __hash__(self):
+        return hash((self.row, self.col))
+
     def __str__(self):
         return f"{self.row},{self.col}({'.'.join([str(m) for m in self.markers])})"
 
@@ -69,6 +116,7 @@ class PathPoint:
         self.length = val
         self.parent = parent
         self.child = child
+        self.order: int = 0  # insertion number in the search area, used to break ties
         if self.parent:
             self.parent.child = self
 
@@ -79,55 +127,205 @@ class PathPoint:
         self.change_length(self.length - new_dist)
 
     def change_length(self, difference: float):
-        self.length -= difference
-        if self.child:
-            self.child.change_length(difference)
+        # a loop instead of recursion, long chains would hit the recursion limit
+        pathpoint = self
+        while pathpoint is not None:
+            pathpoint.length -= difference
+            pathpoint = pathpoint.child
 
     def __eq__(self, other):
         return self.point == other.point
 
 
-def get_closest(points: list[PathPoint], goal: Point) -> PathPoint:
-    min_distance = None
-    closest = None
-    for point in points:
-        cur_distance = point.point.get_manh_distance(goal)
-        if min_distance is None or cur_distance + point.length < min_distance:
-            closest = point
-            min_distance = point.length + cur_distance
-    return closest
+class SearchFront:
+    # open and closed sets of a search going from source to target, the open set is a heap with lazy deletion;
+    # points are ordered by length + estimate, the estimate is the octile distance to the target by default
+    def __init__(self, source: Point, target: Point, estimate=None):
+        self.target = target
+        self.estimate = estimate or target.get_octile_distance
+        self.search_area: dict[Point, PathPoint] = {}
+        self.worked_points: dict[Point, PathPoint] = {}
+        self.open_heap: list[tuple[float, int, PathPoint]] = []
+        self.open_order = itertools.count()
+        self.add(PathPoint(source, 0))
+
+    def add(self, pathpoint: PathPoint):
+        pathpoint.order = next(self.open_order)  # ties break by insertion order
+        self.search_area[pathpoint.point] = pathpoint
+        self.push(pathpoint)
+
+    def push(self, pathpoint: PathPoint):
+        # outdated entries stay in the heap and are skipped by pop_closest
+        heapq.heappush(self.open_heap, (pathpoint.length + self.estimate(pathpoint.point), pathpoint.order, pathpoint))
+
+    def drop_outdated(self):
+        while self.open_heap:
+            distance, _, closest = self.open_heap[0]
+            if self.search_area.get(closest.point) is closest \
+                    and distance == closest.length + self.estimate(closest.point):
+                return
+            heapq.heappop(self.open_heap)
+
+    def get_min_distance(self) -> float:
+        self.drop_outdated()
+        return self.open_heap[0][0] if self.open_heap else math.inf
+
+    def pop_closest(self) -> PathPoint:
+        self.drop_outdated()
+        if not self.open_heap:
+            return None
+        closest = heapq.heappop(self.open_heap)[2]
+        del self.search_area[closest.point]
+        return closest
+
+    def get_length(self, point: Point) -> float:
+        pathpoint = self.search_area.get(point) or self.worked_points.get(point)
+        return math.inf if pathpoint is None else pathpoint.length
+
+    def update_open(self, pathpoint: PathPoint):
+        # change_parent shortens the whole child chain, so every open point in it gets a new key
+        while pathpoint is not None:
+            if self.search_area.get(pathpoint.point) is pathpoint:
+                self.push(pathpoint)
+            pathpoint = pathpoint.child
+
+
+class SolveResult:
+    def __init__(self, path: list[Point], cost: float, expansions: int, peak_search_area: int, elapsed: float):
+        self.path = path  # empty if the goal was not reached
+        self.cost = cost  # None if the goal was not reached
+        self.expansions = expansions
+        self.peak_search_area = peak_search_area
+        self.elapsed = elapsed
+
+    @property
+    def is_found(self) -> bool:
+        return self.cost is not None
+
+
+class PathCache:
+    # solved queries by (wall version, start, goal), the least recently used ones are dropped when there are
+    # more than max_size; an unreachable goal is stored too, with an empty path and None cost
+    def __init__(self, max_size=32):
+        self.max_size = max_size
+        self.paths: OrderedDict[tuple, tuple[list[tuple[int, int]], float]] = OrderedDict()
+
+    def get(self, key: tuple) -> tuple[list[tuple[int, int]], float]:
+        if key not in self.paths:
+            return None
+        self.paths.move_to_end(key)
+        return self.paths[key]
+
+    def put(self, key: tuple, path: list[tuple[int, int]], cost: float) -> None:
+        if self.max_size <= 0:
+            return
+        self.paths[key] = path, cost
+        self.paths.move_to_end(key)
+        while len(self.paths) > self.max_size:
+            self.paths.popitem(last=False)
 
 
 class Maze:
-    def __init__(self, height, width, wall_chance=0.2):  # height and width should be ONLY odd
+    def __init__(self, height, width, wall_chance=0.2, compact=False, seed=None, grid=None, path_cache_size=32,
+                 palette=False):
+        # height and width should be ONLY odd
+        self.compact = compact  # keep the field in a numpy BitGrid instead of list[list[Point]]
+        self.palette = palette  # draw through a PaletteRenderer (numpy) in one scaled blit instead of cell by cell
+        self.renderer = None  # palette_render.PaletteRenderer, made by the first draw
+        self.seed = seed  # seed of the labyrinth walls, picked at random if None
         self.last_changed = None
         self.margin = -1
         self.start_color = (0x00, 0xF2, 0x60)
         self.end_color = (0x05, 0x75, 0xE6)
         self.cell_width, self.cell_height = None, None
+        self.surface: pygame.Surface = None  # cached picture of the field, only changed cells are redrawn on it
+        self.background = None
+        self.dirty_cells: set[tuple[int, int]] = set()
+        self.is_redraw_needed = True
+        self.is_blit_needed = False  # the display lost the picture, but the cached surface is still right
+        self.updated_rects: list[pygame.Rect] = []  # parts of the display changed by the last draw_on_screen
+        self.wall_version = 0  # changes with every wall edit, so cached paths of other walls are never used
+        self.path_cache = PathCache(path_cache_size)
+        self.is_cache_checked = False
+        self.path_cost: float = None
+        self.stats = SearchStats()  # counters and timings of the current search, reset with it
+        self.trace = None  # search_trace.TraceWriter, gets every A* step and path cell when set
+        self.replay = None  # search_trace.TraceReplay that is shown instead of searching, see start_replay
         self.height, self.width, self.wall_chance = height, width, wall_chance
         if self.height % 2 == 0:
             self.height += 1
         if self.width % 2 == 0:
             self.width += 1
         self.map: list[list[Point]] = []
-        self.generate_field()
+        if grid is None:
+            self.generate_field()
+        else:  # an already filled field, e.g. one loaded by maze_file.load_maze
+            self.map = grid
         self.start: Point = None
         self.goal: Point = None
         self.closest: Point = None
 
         self.last_track_point: PathPoint = None
+        self.nodes: NodeStore = None  # A* state, see get_nodes
+        self.clusters: ClusterGraph = None  # abstract graph of HPA*, kept between searches
+        self.cluster_size = 16
+        self.track_node = -1  # next cell of the found A* path for backtrack_path
         self.path: list[Point] = []
-        self.generate_walls()
+        if grid is None:
+            self.generate_walls()
         self.set_path_coords()
 
         self.is_alternative = True
+        self.strategy = SearchStrategy.astar
+        self.incremental = False  # keep the search between edits (D* Lite) instead of starting it over
+        self.planner: DStarLite = None
+        self.use_distance_field = False  # walk the distances to the goal instead of searching, see DistanceField
+        self.distance_field: DistanceField = None
+        self.components: Components = None  # built on the first search, tells an unreachable goal without searching
+        self.replanned_points: set[Point] = set()
+        self.use_background = False  # A* runs in a thread, the frame loop only shows its snapshots
+        self.solver: BackgroundSolver = None
+        self.background_points: set[Point] = set()
+        self.pending_snapshots: deque[SearchSnapshot] = deque()
+        self.background_budget = 0.02  # seconds a frame may spend on showing snapshots, the rest waits for the next
 
         self.working: bool = False
         self.is_path_found = False
         self.path_complete: bool = False  # it means that the self.path variable contains full path
-        self.search_area: list[PathPoint] = [PathPoint(self.start, 0)]
-        self.worked_points: list[PathPoint] = []
+        self.is_exhausted = False  # the search area ran out without reaching the goal
+        self.reset_search_area()
+
+    @property
+    def search_area(self) -> dict[Point, PathPoint]:
+        return self.front.search_area
+
+    @property
+    def worked_points(self) -> dict[Point, PathPoint]:
+        return self.front.worked_points
+
+    def reset_search_area(self):
+        if self.strategy == SearchStrategy.bidirectional:
+            # balanced estimates of the two fronts sum up to zero, that is what makes the stop rule of
+            # find_path_bidirectional valid
+            self.front = SearchFront(self.start, self.goal, lambda point: self.get_balanced_estimate(point))
+            self.back_front = SearchFront(self.goal, self.start, lambda point: -self.get_balanced_estimate(point))
+        else:
+            self.front = SearchFront(self.start, self.goal)
+            self.back_front = SearchFront(self.goal, self.start)
+        self.meeting: tuple[PathPoint, PathPoint] = None
+        self.meeting_length = math.inf
+        self.track_node = -1
+        if self.nodes is not None:
+            self.nodes.reset()
+
+    def get_balanced_estimate(self, point: Point) -> float:
+        return (point.get_octile_distance(self.goal) - point.get_octile_distance(self.start)) / 2
+
+    def add_to_search_area(self, pathpoint: PathPoint):
+        self.front.add(pathpoint)
+
+    def pop_closest(self) -> PathPoint:
+        return self.front.pop_closest()
 
     def restate_solution(self):
         self.remove_if_marker(self.start, Marker.custom)
@@ -136,24 +334,84 @@ class Maze:
         self.working: bool = False
         self.is_path_found = False
         self.path_complete: bool = False
+        self.is_exhausted = False
+        self.is_cache_checked = False
+        self.stats.reset()
+        self.cancel_background()
+        self.stop_replay()
+        if self.trace is not None:
+            self.trace.write_restart()
         self.clear_pathfind()
-        self.search_area: list[PathPoint] = [PathPoint(self.start, 0)]
-        self.worked_points: list[PathPoint] = []
+        self.reset_search_area()
+        self.clear_search_markers(self.path)
         self.path: list[Point] = []
         self.closest: Point = None
 
+    def start_replay(self, path: str):
+        # shows a recorded trace at the speed of the steps, without searching
+        from search_trace import TraceReplay
+        self.restate_solution()
+        self.replay = TraceReplay(self, path)
+
+    def stop_replay(self):
+        if self.replay is not None:
+            self.replay.clear()
+            self.replay.close()
+            self.replay = None
+
     def change_solving(self):
         self.working = not self.working
 
     def change_editing(self):
         self.is_alternative = not self.is_alternative
 
+    def change_strategy(self):
+        strategies = list(SearchStrategy)
+        self.strategy = strategies[(strategies.index(self.strategy) + 1) % len(strategies)]
+        self.restate_solution()
+
+    def change_distance_field(self):
+        self.use_distance_field = not self.use_distance_field
+        self.restate_solution()
+        self.is_redraw_needed = True  # shows or hides the heat map
+
+    def change_background(self):
+        self.use_background = not self.use_background
+        self.restate_solution()
+
+    def change_incremental(self):
+        self.incremental = not self.incremental
+        self.restate_solution()
+        self.planner = None
+
     def get_point(self, point: Point):
         return self.map[point.row][point.col]
 
+    def has_marker(self, point: Point, marker: Marker) -> bool:
+        if self.compact:
+            return self.map.has_marker(point.row, point.col, marker)
+        return marker in self.map[point.row][point.col].markers
+
     def remove_if_marker(self, point: Point, marker: Marker):
         if marker in self.get_point(point).markers:
             self.get_point(point).markers.remove(marker)
+            self.dirty_cells.add((point.row, point.col))
+
+    def add_marker(self, point: Point, marker: Marker):
+        self.get_point(point).markers.append(marker)
+        self.dirty_cells.add((point.row, point.col))
+
+    def add_cell_marker(self, row: int, col: int, marker: Marker):
+        # add_marker for the hot loops of the search, the cell is not looked up through a Point
+        if self.compact:
+            self.map.add_marker(row, col, marker)
+        else:
+            self.map[row][col].markers.append(marker)
+        self.dirty_cells.add((row, col))
+
+    def set_markers(self, point: Point, markers: list[Marker]):
+        self.get_point(point).markers = markers
+        self.dirty_cells.add((point.row, point.col))
 
     def is_point_inbounds(self, point: Point):
         return 0 <= point.row < self.height and 0 <= point.col < self.width
@@ -166,13 +424,24 @@ class Maze:
                 or (start_row == goal_row and start_col == goal_col):
             start_row, start_col = random.randint(0, len(self.map) - 1), random.randint(0, len(self.map[0]) - 1)
             goal_row, goal_col = random.randint(0, len(self.map) - 1), random.randint(0, len(self.map[0]) - 1)
-        self.map[start_row][start_col].markers.append(Marker.start)
-        self.map[goal_row][goal_col].markers.append(Marker.goal)
+        self.add_marker(Point(start_row, start_col), Marker.start)
+        self.add_marker(Point(goal_row, goal_col), Marker.goal)
         self.start = Point(start_row, start_col)
         self.goal = Point(goal_row, goal_col)
 
     def generate_walls(self):
-        matrix_right_borders, matrix_down_borders = generate_labyrinth(self.width // 2, self.height // 2)
+        self.is_redraw_needed = True
+        self.wall_version += 1
+        self.components = None
+        self.nodes = None
+        self.clusters = None
+        if self.seed is None:
+            self.seed = random.getrandbits(32)
+        rng = random.Random(self.seed)
+        if self.compact:
+            self.map.generate_walls(rng)
+            return
+        matrix_right_borders, matrix_down_borders = generate_labyrinth(self.width // 2, self.height // 2, rng)
         for row in range(self.height):
             for col in range(self.width):
                 if row == 0:
@@ -187,6 +456,12 @@ class Maze:
                     self.map[row][col].markers = [Marker.wall]
 
     def generate_field(self):
+        self.is_redraw_needed = True
+        self.renderer = None
+        if self.compact:
+            from bit_grid import BitGrid  # numpy is only needed for the compact field
+            self.map = BitGrid(self.height, self.width)
+            return
         for row in range(self.height):
             self.map.append([])
             for col in range(self.width):
@@ -194,9 +469,16 @@ class Maze:
                 self.map[-1].append(
                     Point(row, col, markers=markers))
 
-    def rebuild(self, walls=True):
+    def rebuild(self, walls=True, seed=None):
         self.restate_solution()
+        self.planner = None
+        self.distance_field = None
+        self.components = None
+        self.nodes = None
+        self.clusters = None
         self.working: bool = False
+        self.wall_version += 1
+        self.seed = seed
         self.map = []
         self.generate_field()
         if walls:
@@ -206,75 +488,168 @@ class Maze:
         self.path: list[Point] = []
         self.is_path_found = False
         self.path_complete: bool = False  # it means that the self.path variable contains full path
-        self.search_area: list[PathPoint] = [PathPoint(self.start, 0)]
-        self.worked_points: list[PathPoint] = []
+        self.is_exhausted = False
+        self.reset_search_area()
+
+    def get_cell_heat(self, row: int, col: int) -> float:
+        # heat map of the distances to the goal, None where it is not shown
+        if self.use_distance_field and self.distance_field is not None:
+            return self.distance_field.get_heat(Point(row, col))
+        return None
+
+    def get_cell_color(self, row: int, col: int, color) -> tuple[int, int, int]:
+        markers = self.map[row][col].markers
+        if Marker.custom in markers:
+            return self.map[row][col].color
+        for marker, marker_color in MARKER_COLORS:
+            if marker in markers:
+                return marker_color
+        heat = self.get_cell_heat(row, col)
+        if heat is not None:  # lighter is closer
+            return 255, 255 - int(200 * heat), 255 - int(255 * heat)
+        return color
+
+    def get_cell_rect(self, row: int, col: int) -> pygame.Rect:
+        # with the negative margin neighbor cells overlap, so a cell is drawn up to the start of the next one instead:
+        # the cells tile the field and any of them can be redrawn alone
+        left = int(self.margin + col * (self.cell_width + self.margin))
+        top = int(self.margin + row * (self.cell_height + self.margin))
+        right = int(self.margin + (col + 1) * (self.cell_width + self.margin))
+        bottom = int(self.margin + (row + 1) * (self.cell_height + self.margin))
+        if self.margin >= 0:
+            right, bottom = int(left + self.cell_width), int(top + self.cell_height)
+        return pygame.Rect(left, top, right - left, bottom - top)
+
+    def get_renderer(self):
+        if self.renderer is None:
+            from palette_render import PaletteRenderer  # numpy is only needed for the palette rendering
+            self.renderer = PaletteRenderer(self.height, self.width)
+            self.is_redraw_needed = True
+        return self.renderer
+
+    def draw_states(self, color):
+        # puts the changed cells into the palette indices of the renderer and draws them on the cached surface
+        renderer = self.get_renderer()
+        renderer.set_background(color)
+        is_heat_shown = self.use_distance_field and self.distance_field is not None
+        if self.is_redraw_needed and self.compact and not is_heat_shown:
+            renderer.set_flag_cells(self.map.cells, self.map.colors)
+        elif self.is_redraw_needed:
+            for row in range(self.height):
+                renderer.set_row(row, [renderer.get_state(row, col, point.markers,
+                                                          self.get_cell_heat(row, col) if is_heat_shown else None)
+                                       for col, point in enumerate(self.map[row])])
+        else:
+            for row, col in self.dirty_cells:
+                renderer.set_cell(row, col, self.map[row][col].markers, self.get_cell_heat(row, col))
+        if renderer.is_changed:
+            renderer.draw(self.surface)
+            self.is_blit_needed = True
 
     def draw_on_screen(self, display: pygame.Surface, color, params):
+        started = time.perf_counter()
         self.size = params[2], params[3]
         self.cell_width, self.cell_height = (params[2] - self.margin * (len(self.map[0]) + 1)) / (len(self.map[0])), \
                                             (params[3] - self.margin * (len(self.map) + 1)) / (len(self.map))
-        for row in range(len(self.map)):
-            for col in range(len(self.map[row])):
-                pick = color
-                if Marker.custom in self.map[row][col].markers:
-                    pick = self.map[row][col].color
-                elif Marker.start in self.map[row][col].markers:
-                    pick = (255, 0, 0)
-                elif Marker.goal in self.map[row][col].markers:
-                    pick = (0, 255, 0)
-                elif Marker.wrong in self.map[row][col].markers:
-                    pick = (255, 0, 255)
-                elif Marker.confirmed in self.map[row][col].markers:
-                    pick = (0, 255, 255)
-                elif Marker.current_closest in self.map[row][col].markers:
-                    pick = (0x6A, 0x0D, 0xAD)
-                elif Marker.path in self.map[row][col].markers:
-                    pick = (255, 255, 0)
-                elif Marker.wall in self.map[row][col].markers:
-                    pick = (0, 0, 0)
-                pygame.draw.rect(display, pick, (
-                    params[0] + self.margin + col * (self.cell_width + self.margin),
-                    params[1] + self.margin + row * (self.cell_height + self.margin),
-                    self.cell_width, self.cell_height
-                ))
+        if self.surface is None or self.surface.get_size() != self.size or self.background != color:
+            self.surface = pygame.Surface(self.size)
+            self.background = color
+            self.is_redraw_needed = True
+        if self.palette:
+            self.draw_states(color)
+            self.dirty_cells = set()
+            self.is_redraw_needed = False
+            self.updated_rects = [display.blit(self.surface, params[:2])] if self.is_blit_needed else []
+            self.is_blit_needed = False
+            self.stats.record_draw(time.perf_counter() - started)
+            return
+        if self.is_redraw_needed:
+            self.surface.fill((0, 0, 0))
+            cells = ((row, col) for row in range(len(self.map)) for col in range(len(self.map[0])))
+        else:
+            cells = self.dirty_cells
+        rects = []
+        for row, col in cells:
+            rect = self.get_cell_rect(row, col)
+            self.surface.fill(self.get_cell_color(row, col, color), rect)
+            rects.append(rect)
+        if self.is_redraw_needed or self.is_blit_needed:
+            rects = [self.surface.get_rect()]
+        self.dirty_cells = set()
+        self.is_redraw_needed = False
+        self.is_blit_needed = False
+        self.updated_rects = [display.blit(self.surface, rect.move(params[0], params[1]), rect) for rect in rects]
+        self.stats.record_draw(time.perf_counter() - started)
 
     def is_cell_drawable(self, point: Point):
         return self.is_point_inbounds(point) and Marker.goal not in self.get_point(point).markers \
             and Marker.start not in self.get_point(point).markers \
             and (self.last_changed is not None and self.last_changed != point)
 
+    def on_wall_changed(self, point: Point):
+        # the cell became a wall or was cleared: everything that is kept between searches is told about it
+        self.wall_version += 1
+        if self.planner is not None:
+            self.planner.update_cell(point)
+        if self.distance_field is not None:
+            changed = self.distance_field.update_cell(point)
+            if self.use_distance_field:
+                self.dirty_cells.update((cell.row, cell.col) for cell in changed)
+        if self.components is not None:
+            self.components.update_cell(point.row, point.col, self.has_marker(point, Marker.wall))
+        if self.nodes is not None:
+            self.nodes.set_blocked(point.row, point.col, self.has_marker(point, Marker.wall))
+        if self.clusters is not None:
+            self.clusters.update_cell(point.row, point.col)
+
     def draw_cell(self, point: Point):
         if self.is_cell_drawable(point):
-            self.get_point(point).markers = [Marker.wall]
+            self.set_markers(point, [Marker.wall])
+            self.on_wall_changed(point)
         self.last_changed = point
 
     def clear_cell(self, point: Point):
         if self.is_cell_drawable(point):
-            self.get_point(point).markers = [Marker.empty]
+            self.set_markers(point, [Marker.empty])
+            self.on_wall_changed(point)
         self.last_changed = point
 
     def clear_pathfind(self):
-        for point in self.search_area:
-            if self.start != point.point:
-                self.get_point(point.point).markers = [Marker.empty]
-        for point in self.worked_points:
-            if self.start != point.point:
-                self.get_point(point.point).markers = [Marker.empty]
+        for front in (self.front, self.back_front):
+            self.clear_search_markers(pathpoint.point for pathpoint in front.search_area.values())
+            self.clear_search_markers(pathpoint.point for pathpoint in front.worked_points.values())
+        if self.nodes is not None:
+            self.clear_search_markers(Point(*self.nodes.get_cell(node)) for node in self.nodes.touched)
+        self.clear_search_markers(self.replanned_points)
+        self.replanned_points = set()
+        self.clear_search_markers(self.background_points)
+        self.background_points = set()
 
     def move_start(self, point: Point):
         if self.is_point_inbounds(point) and self.goal != point and self.start != point:
+            self.remove_if_marker(self.start, Marker.start)
             self.start = point
             self.restate_solution()
-            self.get_point(point).markers = [Marker.empty, Marker.start]
+            was_wall = self.has_marker(point, Marker.wall)
+            self.set_markers(point, [Marker.empty, Marker.start])
+            if self.planner is not None:
+                self.planner.move_start(point)
+            if was_wall:
+                self.on_wall_changed(point)
 
     def move_goal(self, point: Point):
         if self.is_point_inbounds(point) and self.goal != point and self.start != point:
             self.restate_solution()
+            self.planner = None  # the incremental search is rooted at the goal, so it starts over
+            self.distance_field = None
             self.remove_if_marker(self.goal, Marker.goal)
             self.remove_if_marker(self.goal, Marker.custom)
             self.remove_if_marker(self.start, Marker.custom)
             self.goal = point
-            self.get_point(point).markers = [Marker.empty, Marker.goal]
+            was_wall = self.has_marker(point, Marker.wall)
+            self.set_markers(point, [Marker.empty, Marker.goal])
+            if was_wall:
+                self.on_wall_changed(point)
 
     def catch_click(self, local_click, actions):
         pr_col = (local_click[0] - self.margin) / (self.cell_width + self.margin)
@@ -295,111 +670,572 @@ class Maze:
                     # self.restate_solution()
                     self.move_goal(Point(int(pr_row), int(pr_col)))
 
+    def is_hierarchical_search(self) -> bool:
+        # the distance field and the incremental search take the query over before the strategy, see make_step
+        return self.strategy == SearchStrategy.hierarchical and not self.use_distance_field and not self.incremental
+
+    def get_path_key(self) -> tuple:
+        # HPA* paths are not always the shortest, so they are kept apart from the paths of the other searches
+        return self.wall_version, (self.start.row, self.start.col), (self.goal.row, self.goal.col), \
+            self.is_hierarchical_search()
+
+    def remember_path(self, path: list[Point], cost: float):
+        self.path_cache.put(self.get_path_key(), [(point.row, point.col) for point in path], cost)
+
+    def restore_cached_path(self) -> bool:
+        # shows the stored path of the same query at once, as if backtrack_path had just finished it
+        self.is_cache_checked = True
+        cached = self.path_cache.get(self.get_path_key())
+        if cached is None:
+            return False
+        path, self.path_cost = cached
+        if self.path_cost is None:
+            self.is_exhausted = True
+            return True
+        self.is_path_found = True
+        self.path_complete = True
+        self.path = [self.get_point(Point(row, col)) for row, col in path]
+        self.apply_gradient_first_time()
+        return True
+
+    def get_blocked(self) -> bytearray:
+        # the walls inside a border of walls, a byte a cell in the layout of NodeStore
+        if self.compact:
+            return self.map.get_blocked()
+        stride = self.width + 2
+        blocked = bytearray(b'\x01') * ((self.height + 2) * stride)
+        for row, points in enumerate(self.map):
+            for col, point in enumerate(points):
+                if Marker.wall not in point.markers:
+                    blocked[(row + 1) * stride + col + 1] = 0
+        return blocked
+
+    def is_goal_reachable(self) -> bool:
+        if self.components is None:
+            self.components = Components(self.height, self.width, self.get_blocked())
+            self.components.compute()
+        return self.components.is_connected(self.start, self.goal)
+
+    def reject_unreachable(self) -> bool:
+        # the goal is in another component than the start, so the search would only flood the start's one
+        if self.is_goal_reachable():
+            return False
+        self.is_exhausted = True
+        self.remember_path([], None)
+        return True
+
+    def get_open_size(self) -> int:
+        if self.incremental and self.planner is not None:
+            return len(self.planner.open_keys)
+        if self.is_background_search():
+            return self.stats.open_size
+        if self.strategy == SearchStrategy.astar:
+            return 1 if self.nodes is None or self.nodes.start == -1 else self.nodes.open_count
+        return len(self.front.search_area) + len(self.back_front.search_area)
+
     def next_step(self):
         if self.working:
-            if not self.is_path_found:
-                self.find_path()
-            elif not self.path_complete:
-                self.backtrack_path()
+            started = time.perf_counter()
+            self.make_step()
+            self.stats.record_step(time.perf_counter() - started, self.get_open_size())
+
+    def make_step(self):
+        if self.replay is not None:
+            self.replay.advance()
+            return
+        if self.is_exhausted:
+            return
+        # the connectivity index is built on the first search over the whole field, the background search
+        # finds an unreachable goal by itself instead, so the frame never waits for the field
+        if not self.is_cache_checked and not self.is_path_found \
+                and (self.restore_cached_path() or not self.is_background_search() and self.reject_unreachable()):
+            return
+        if self.use_distance_field and not self.path_complete:
+            self.walk_distance_field()
+        elif self.is_background_search() and not self.path_complete:
+            self.poll_background()
+        elif self.incremental and not self.path_complete:
+            self.replan_step()
+        elif not self.is_path_found:
+            self.search_step()
+        elif not self.path_complete:
+            self.backtrack_path()
+        else:
+            self.shift_gradient()
+
+    def set_endpoints(self, start: Point, goal: Point):
+        if not self.is_point_inbounds(start) or not self.is_point_inbounds(goal) or start == goal:
+            raise ValueError(f"Can not search from {start} to {goal}")
+        self.restate_solution()
+        if goal != self.goal:
+            self.planner = None  # both are rooted at the goal, with the same goal only the start is new to them
+            self.distance_field = None
+        self.remove_if_marker(self.start, Marker.start)
+        self.remove_if_marker(self.goal, Marker.goal)
+        self.start, self.goal = Point(start.row, start.col), Point(goal.row, goal.col)
+        if self.planner is not None:
+            self.planner.move_start(self.start)
+        for point, marker in (self.start, Marker.start), (self.goal, Marker.goal):
+            was_wall = self.has_marker(point, Marker.wall)
+            self.set_markers(point, [Marker.empty, marker])
+            if was_wall:
+                self.on_wall_changed(point)
+        self.restate_solution()
+
+    def solve(self, start: Point = None, goal: Point = None, max_expansions: int = None,
+              time_budget: float = None) -> SolveResult:
+        # runs the whole search at once, without the frame loop; time_budget is in seconds
+        start = self.start if start is None else start
+        goal = self.goal if goal is None else goal
+        # unlike placing an endpoint in the demo, a query does not clear the wall it is given
+        for point in start, goal:
+            if self.is_point_inbounds(point) and self.has_marker(point, Marker.wall):
+                raise ValueError(f"Can not search from {start} to {goal}, {point} is a wall")
+        if start != self.start or goal != self.goal:
+            self.set_endpoints(start, goal)
+        else:
+            self.restate_solution()
+        started = time.perf_counter()
+        if self.restore_cached_path():
+            path = [Point(point.row, point.col) for point in self.path]
+            return SolveResult(path, self.path_cost, 0, 0, time.perf_counter() - started)
+        if self.reject_unreachable():
+            return SolveResult([], None, 0, 0, time.perf_counter() - started)
+        if self.use_distance_field:
+            expansions = self.walk_distance_field()
+            path = [Point(point.row, point.col) for point in self.path]
+            return SolveResult(path, self.path_cost, expansions, 0, time.perf_counter() - started)
+        peak_search_area = self.get_open_size()
+        while not self.is_path_found and not self.is_exhausted:
+            if max_expansions is not None and self.stats.expansions >= max_expansions:
+                break
+            if time_budget is not None and time.perf_counter() - started >= time_budget:
+                break
+            step_started = time.perf_counter()
+            if self.incremental:
+                self.replan_step()
             else:
-                self.shift_gradient()
+                self.search_step()
+            self.stats.record_step(time.perf_counter() - step_started, self.get_open_size())
+            peak_search_area = max(peak_search_area, self.get_open_size())
+        path, cost = [], None
+        if self.is_path_found:
+            while not self.path_complete:
+                self.backtrack_path()
+            cost = self.path_cost
+            path = [Point(point.row, point.col) for point in self.path]
+        return SolveResult(path, cost, self.stats.expansions, peak_search_area, time.perf_counter() - started)
+
+    def search_step(self):
+        if self.strategy == SearchStrategy.jps:
+            self.find_jump_path()
+        elif self.strategy == SearchStrategy.bidirectional:
+            self.find_path_bidirectional()
+        elif self.strategy == SearchStrategy.hierarchical:
+            self.find_path_hierarchical()
+        else:
+            self.find_path()
+        if self.is_exhausted:
+            self.remember_path([], None)
+
+    def get_nodes(self) -> NodeStore:
+        # the arrays of A* are made once per field, a new search only resets the cells the last one touched
+        if self.nodes is None:
+            self.nodes = NodeStore(self.height, self.width,
+                                   lambda row, col: self.has_marker(Point(row, col), Marker.wall))
+        if self.nodes.start == -1:
+            self.nodes.begin((self.start.row, self.start.col), (self.goal.row, self.goal.col))
+        return self.nodes
 
     def find_path(self):
         if self.closest is not None:
             self.remove_if_marker(self.closest, Marker.current_closest)
-        closest = get_closest(self.search_area, self.goal)
+        nodes = self.get_nodes()
+        closest = nodes.pop_closest()
+        if closest == -1:
+            self.is_exhausted = True
+            return
+        row, col = nodes.get_cell(closest)
+        self.closest = self.map[row][col]
+        self.add_cell_marker(row, col, Marker.current_closest)
+        seen, shortened = nodes.expand(closest)
+        self.stats.reparents += len(shortened)
+        if self.trace is not None:
+            self.trace.write_expansion((row, col), [nodes.get_cell(n) for n in seen],
+                                       [nodes.get_cell(n) for n in shortened])
+        for n in seen:
+            if n == nodes.goal:
+                self.is_path_found = True
+                self.track_node = n
+                self.path_cost = nodes.g[n]
+            else:
+                self.add_cell_marker(*nodes.get_cell(n), Marker.path)
+        if not seen and not shortened:
+            self.add_cell_marker(row, col, Marker.wrong)
+        self.stats.expansions += 1
+
+    def is_walkable(self, row: int, col: int) -> bool:
+        point = Point(row, col)
+        return self.is_point_inbounds(point) and not self.has_marker(point, Marker.wall) \
+            and not self.has_marker(point, Marker.start)
+
+    def jump(self, row: int, col: int, d_row: int, d_col: int) -> tuple[Point, float]:
+        # moves from the cell in the direction until the next jump point, returns it (None for a dead end)
+        # together with the length of the move
+        length = 0
+        offset = math.sqrt(2) if d_row and d_col else 1
+        while True:
+            row, col = row + d_row, col + d_col
+            length += offset
+            if not self.is_walkable(row, col):
+                return None, length
+            if row == self.goal.row and col == self.goal.col:
+                return Point(row, col), length
+            if d_row and d_col:
+                if self.is_walkable(row + d_row, col - d_col) and not self.is_walkable(row, col - d_col) \
+                        or self.is_walkable(row - d_row, col + d_col) and not self.is_walkable(row - d_row, col) \
+                        or self.jump(row, col, d_row, 0)[0] is not None or self.jump(row, col, 0, d_col)[0] is not None:
+                    return Point(row, col), length
+            elif d_row:
+                if self.is_walkable(row + d_row, col + 1) and not self.is_walkable(row, col + 1) \
+                        or self.is_walkable(row + d_row, col - 1) and not self.is_walkable(row, col - 1):
+                    return Point(row, col), length
+            elif self.is_walkable(row + 1, col + d_col) and not self.is_walkable(row + 1, col) \
+                    or self.is_walkable(row - 1, col + d_col) and not self.is_walkable(row - 1, col):
+                return Point(row, col), length
+
+    def get_jump_directions(self, pathpoint: PathPoint) -> list[tuple[int, int]]:
+        # directions left after pruning the symmetric ones, the natural and the forced neighbors of the move
+        row, col = pathpoint.point.row, pathpoint.point.col
+        if pathpoint.parent is None:
+            return [(n.row - row, n.col - col) for n in pathpoint.point.get_neighbors()]
+        d_row = (row > pathpoint.parent.point.row) - (row < pathpoint.parent.point.row)
+        d_col = (col > pathpoint.parent.point.col) - (col < pathpoint.parent.point.col)
+        if d_row and d_col:
+            directions = [(d_row, 0), (0, d_col), (d_row, d_col)]
+            if not self.is_walkable(row, col - d_col):
+                directions.append((d_row, -d_col))
+            if not self.is_walkable(row - d_row, col):
+                directions.append((-d_row, d_col))
+        elif d_row:
+            directions = [(d_row, 0)]
+            if not self.is_walkable(row, col + 1):
+                directions.append((d_row, 1))
+            if not self.is_walkable(row, col - 1):
+                directions.append((d_row, -1))
+        else:
+            directions = [(0, d_col)]
+            if not self.is_walkable(row + 1, col):
+                directions.append((1, d_col))
+            if not self.is_walkable(row - 1, col):
+                directions.append((-1, d_col))
+        return directions
+
+    def find_jump_path(self):
+        # Jump Point Search: same open and closed sets as find_path, but only jump points get into them
+        if self.closest is not None:
+            self.remove_if_marker(self.closest, Marker.current_closest)
+        closest = self.pop_closest()
         if closest is None:
+            self.is_exhausted = True
+            return
+        self.closest = self.get_point(closest.point)
+        self.add_marker(self.closest, Marker.current_closest)
+        is_successful = False
+        for d_row, d_col in self.get_jump_directions(closest):
+            jump_point, length = self.jump(closest.point.row, closest.point.col, d_row, d_col)
+            if jump_point is None or jump_point in self.worked_points:
+                continue
+            length += closest.length
+            is_successful = True
+            if jump_point == self.goal:
+                self.is_path_found = True
+                self.last_track_point = self.interpolate_track(PathPoint(jump_point, length, closest))
+                continue
+            pp = self.search_area.get(jump_point)
+            if pp is not None:
+                if pp.length > length:
+                    pp.change_parent(closest, length)
+                    self.stats.reparents += 1
+                    self.update_open(pp)
+            else:
+                self.add_to_search_area(PathPoint(jump_point, length, closest))
+                self.add_marker(jump_point, Marker.path)
+        if not is_successful:
+            self.add_marker(closest.point, Marker.wrong)
+        self.worked_points[closest.point] = closest
+        self.stats.expansions += 1
+
+    def interpolate_track(self, pathpoint: PathPoint) -> PathPoint:
+        # jump points are joined by straight or diagonal runs, backtrack_path needs every cell of them
+        points: list[Point] = []
+        while pathpoint.parent is not None:
+            parent = pathpoint.parent.point
+            d_row = (pathpoint.point.row > parent.row) - (pathpoint.point.row < parent.row)
+            d_col = (pathpoint.point.col > parent.col) - (pathpoint.point.col < parent.col)
+            point = pathpoint.point
+            while point != parent:
+                points.append(point)
+                point = Point(point.row - d_row, point.col - d_col)
+            pathpoint = pathpoint.parent
+        track = pathpoint
+        for point in reversed(points):
+            offset = math.sqrt(2) if point.row != track.point.row and point.col != track.point.col else 1
+            track = PathPoint(point, track.length + offset, track)
+        return track
+
+    def update_open(self, pathpoint: PathPoint):
+        self.front.update_open(pathpoint)
+
+    def find_path_bidirectional(self):
+        # A* from the start and from the goal at once, every step expands the front with the smaller search area
+        if self.closest is not None:
+            self.remove_if_marker(self.closest, Marker.current_closest)
+            self.closest = None
+        # no path that is not found yet can be shorter than the sum of the two minimal estimates
+        if self.meeting_length <= self.front.get_min_distance() + self.back_front.get_min_distance():
+            self.join_fronts()
             return
+        is_forward = len(self.front.search_area) <= len(self.back_front.search_area)
+        front, other = (self.front, self.back_front) if is_forward else (self.back_front, self.front)
+        closest = front.pop_closest()
         self.closest = self.get_point(closest.point)
-        self.closest.markers.append(Marker.current_closest)
-        neighbors = closest.point.get_neighbors()
+        self.add_marker(self.closest, Marker.current_closest)
         is_successful = False
-        is_useful = False
-        for n in neighbors:
-            offset = 1
-            if abs(closest.point.row - n.row) + abs(closest.point.col - n.col) == 2:
-                offset = math.sqrt(2)
-            is_possible = self.is_point_inbounds(n) and \
-                          (PathPoint(n, closest.length) not in self.worked_points) \
-                          and Marker.wall not in self.get_point(n).markers \
-                          and Marker.start not in self.get_point(n).markers
-            for pp in self.search_area:
-                if pp.point == n:
-                    if pp.length > closest.length + offset:
-                        pp.change_parent(closest,closest.length + offset)
-                        is_useful = True
-                    is_possible = False
-            if is_possible:
+        for n in closest.point.get_neighbors():
+            offset = math.sqrt(2) if n.row != closest.point.row and n.col != closest.point.col else 1
+            length = closest.length + offset
+            # moves never enter the start, so going back from the goal they never leave it
+            if not self.is_point_inbounds(n) or self.has_marker(n, Marker.wall) \
+                    or is_forward and n == self.start or not is_forward and closest.point == self.start:
+                continue
+            if length + other.get_length(n) < self.meeting_length:
+                self.meeting_length = length + other.get_length(n)
+                other_pathpoint = other.search_area.get(n) or other.worked_points.get(n)
+                self.meeting = (closest, other_pathpoint) if is_forward else (other_pathpoint, closest)
+            if n in front.worked_points:
+                continue
+            pp = front.search_area.get(n)
+            if pp is not None:
+                if pp.length > length:
+                    pp.change_parent(closest, length)
+                    self.stats.reparents += 1
+                    front.update_open(pp)
+                    is_successful = True
+            elif n != self.start and n != self.goal:
                 is_successful = True
-                if n == self.goal:
-                    self.is_path_found = True
-                    self.last_track_point = PathPoint(n, closest.length + offset, closest)
-                    print(self.last_track_point.length)
-                else:
-                    self.search_area.append(PathPoint(n, closest.length + offset, closest))
-                    self.get_point(n).markers.append(Marker.path)
-        if not is_successful and not is_useful:
-            self.get_point(closest.point).markers.append(Marker.wrong)
-        # self.get_point(closest.point).markers.append(Marker.wrong)
-        self.worked_points.append(closest)
-        self.search_area.remove(closest)
+                front.add(PathPoint(n, length, closest))
+                self.add_marker(n, Marker.path)
+        if not is_successful:
+            self.add_marker(closest.point, Marker.wrong)
+        front.worked_points[closest.point] = closest
+        self.stats.expansions += 1
+
+    def find_path_hierarchical(self):
+        # the whole query is one step: a search over the cluster graph and the refinement of the clusters it chose
+        if self.clusters is None:
+            self.clusters = ClusterGraph(self.height, self.width,
+                                         lambda row, col: self.has_marker(Point(row, col), Marker.wall),
+                                         self.cluster_size)
+        path, cost = self.clusters.find_path((self.start.row, self.start.col), (self.goal.row, self.goal.col))
+        self.stats.expansions += self.clusters.expansions
+        if cost is None:
+            self.is_exhausted = True
+            return
+        track = PathPoint(Point(*path[0]), 0)
+        for row, col in path[1:]:
+            offset = math.sqrt(2) if row != track.point.row and col != track.point.col else 1
+            track = PathPoint(Point(row, col), track.length + offset, track)
+        self.is_path_found = True
+        self.last_track_point = track
+
+    def join_fronts(self):
+        # stitches the two half paths at the meeting edge, so backtrack_path can walk it from the goal as usual
+        if self.meeting is None:
+            self.is_exhausted = True
+            return
+        track, back_track = self.meeting
+        if back_track.point == track.point:
+            back_track = back_track.parent
+        while back_track is not None:
+            offset = math.sqrt(2) if back_track.point.row != track.point.row \
+                and back_track.point.col != track.point.col else 1
+            track = PathPoint(back_track.point, track.length + offset, track)
+            back_track = back_track.parent
+        self.is_path_found = True
+        self.last_track_point = track
+
+    def is_background_search(self) -> bool:
+        # only the plain A* of the demo runs in the background, the other modes keep their own steps
+        return self.use_background and self.strategy == SearchStrategy.astar \
+            and not self.incremental and not self.use_distance_field
+
+    def cancel_background(self):
+        if self.solver is not None:
+            self.solver.cancel()
+            self.solver = None
+        self.pending_snapshots.clear()
+
+    def poll_background(self):
+        # shows what the thread published, as much as fits in background_budget, so a fast search on a big field
+        # does not make long frames; the found path is shown at once, without the snapshots that are still waiting
+        if self.solver is None:
+            self.solver = BackgroundSolver(self.height, self.width,
+                                           lambda row, col: self.has_marker(Point(row, col), Marker.wall),
+                                           (self.start.row, self.start.col), (self.goal.row, self.goal.col))
+            self.solver.begin()
+        self.pending_snapshots.extend(self.solver.poll())
+        if self.pending_snapshots and self.pending_snapshots[-1].is_done:
+            snapshot = self.pending_snapshots.pop()
+            self.cancel_background()
+            self.stats.expansions = snapshot.expansions
+            self.stats.open_size = snapshot.open_size
+            self.finish_background(snapshot)
+            return
+        deadline = time.perf_counter() + self.background_budget
+        while self.pending_snapshots and time.perf_counter() < deadline:
+            snapshot = self.pending_snapshots.popleft()
+            if self.closest is not None:
+                self.remove_if_marker(self.closest, Marker.current_closest)
+                self.closest = None
+            for cell in snapshot.opened:
+                point = self.get_point(Point(*cell))
+                self.add_marker(point, Marker.path)
+                self.background_points.add(point)
+            for cell in snapshot.dead_ends:
+                point = self.get_point(Point(*cell))
+                self.add_marker(point, Marker.wrong)
+                self.background_points.add(point)
+            if snapshot.closest is not None:
+                self.closest = self.get_point(Point(*snapshot.closest))
+                self.add_marker(self.closest, Marker.current_closest)
+            self.stats.expansions = snapshot.expansions
+            self.stats.open_size = snapshot.open_size
+
+    def finish_background(self, snapshot: SearchSnapshot):
+        self.clear_pathfind()
+        self.path = [self.get_point(Point(*cell)) for cell in snapshot.path]
+        self.path_cost = snapshot.cost
+        self.remember_path(self.path, self.path_cost)
+        if not self.path:
+            self.is_exhausted = True
+            return
+        self.is_path_found = True
+        self.path_complete = True
+        self.apply_gradient_first_time()
+
+    def replan_step(self):
+        # one expansion of the incremental search, the path is shown as soon as the search is up to date again
+        if self.planner is None:
+            self.planner = DStarLite(
+                self.start, self.goal, self.is_point_inbounds, lambda point: self.has_marker(point, Marker.wall))
+        if self.closest is not None:
+            self.remove_if_marker(self.closest, Marker.current_closest)
+            self.closest = None
+        point = self.planner.step()
+        if point is not None:
+            self.stats.expansions += 1
+            if point != self.start and point != self.goal:
+                self.closest = self.get_point(point)
+                self.add_marker(self.closest, Marker.current_closest)
+                if point not in self.replanned_points:
+                    self.add_marker(self.closest, Marker.path)
+                    self.replanned_points.add(point)
+            return
+        self.is_path_found = True
+        self.path_complete = True
+        self.clear_pathfind()
+        self.path = [self.get_point(point) for point in self.planner.get_path()]
+        self.path_cost = self.planner.get_cost() if self.path else None
+        self.remember_path(self.path, self.path_cost)
+        if self.path:
+            self.apply_gradient_first_time()
+
+    def walk_distance_field(self) -> int:
+        # the field is computed once for the goal, after that the path from any start is found without a search;
+        # returns the number of cells expanded to compute it
+        expansions = 0
+        if self.distance_field is None:
+            self.distance_field = DistanceField(
+                self.goal, self.is_point_inbounds, lambda point: self.has_marker(point, Marker.wall))
+            self.distance_field.compute()
+            expansions = self.distance_field.expansions
+            self.is_redraw_needed = True
+        self.path = [self.get_point(point) for point in self.distance_field.get_path(self.start)]
+        self.path_cost = self.distance_field.get_distance(self.start) if self.path else None
+        self.remember_path(self.path, self.path_cost)
+        if not self.path:
+            self.is_exhausted = True
+            return expansions
+        self.is_path_found = True
+        self.path_complete = True
+        self.apply_gradient_first_time()
+        return expansions
 
     def apply_gradient_first_time(self):
+        # every color is taken from the start one, a rounded step added up would leave 0..255 on long paths
         path_length = len(self.path)
         change = add_colors(self.end_color, self.start_color, True)
-        change = change[0] // path_length, change[1] // path_length, change[2] // path_length
-        current_color = self.start_color
-        for point in self.path:
-            point.markers.append(Marker.custom)
-            point.set_color(current_color)
-            current_color = add_colors(current_color, change)
+        for index, point in enumerate(self.path):
+            self.add_marker(point, Marker.custom)
+            point.set_color(add_colors(self.start_color, tuple(part * index // path_length for part in change)))
+        if self.palette:
+            self.get_renderer().set_path([(point.row, point.col) for point in self.path],
+                                         [point.color for point in self.path])
 
     def backtrack_path(self):
-        if self.last_track_point is not None:
-            self.get_point(self.last_track_point.point).markers.append(Marker.confirmed)
+        # A* paths go along the parent ids of the node store, the other searches leave a chain of PathPoint
+        if self.track_node != -1:
+            point = Point(*self.nodes.get_cell(self.track_node))
+            if self.trace is not None:
+                self.trace.write_path((point.row, point.col))
+            self.add_marker(point, Marker.confirmed)
+            self.path.append(self.get_point(point))
+            self.track_node = self.nodes.parent[self.track_node]
+        elif self.last_track_point is not None:
+            if not self.path:
+                self.path_cost = self.last_track_point.length
+            if self.trace is not None:
+                self.trace.write_path((self.last_track_point.point.row, self.last_track_point.point.col))
+            self.add_marker(self.last_track_point.point, Marker.confirmed)
             self.path.append(self.get_point(self.last_track_point.point))
             self.last_track_point = self.last_track_point.parent
         else:
             self.path_complete = True
             self.path = self.path[::-1]
             self.clear_pathfind()
+            self.remember_path(self.path, self.path_cost)
             self.apply_gradient_first_time()
 
     def shift_gradient(self):
+        if not self.path:
+            return
+        if self.palette:  # the colors of the points stay as they were, only the palette turns
+            self.get_renderer().rotate_path()
+            return
         last_color = self.path[-1].color
         for point in self.path:
             last_color, point.color = point.color, last_color
+            self.dirty_cells.add((point.row, point.col))
 
-    def clear_pathpoint_list(self, cur_list: list[PathPoint]) -> None:
-        for pathpoint in cur_list:
-            cur_point = self.get_point(pathpoint.point)
-            if Marker.goal in cur_point.markers:
-                cur_point.markers = [Marker.goal]
-            elif Marker.start in cur_point.markers:
-                cur_point.markers = [Marker.start]
-            else:
-                cur_point.markers = [Marker.empty]
-
-    def clear_point_list(self, cur_list: list[Point]) -> None:
-        for point in cur_list:
+    def clear_search_markers(self, points) -> None:
+        # a searched cell may have been drawn over since, so only the search markers are taken off it
+        for point in points:
             cur_point = self.get_point(point)
-            if Marker.goal in cur_point.markers:
-                cur_point.markers = [Marker.goal]
-            elif Marker.start in cur_point.markers:
-                cur_point.markers = [Marker.start]
-            else:
-                cur_point.markers = [Marker.empty]
+            markers = [marker for marker in cur_point.markers if marker not in SEARCH_MARKERS]
+            if len(markers) != len(cur_point.markers):
+                self.set_markers(cur_point, markers or [Marker.empty])
 
     def clear_path(self):
         self.working = False
         self.closest = None
         self.is_path_found = False
         self.path_complete = False
-        self.clear_pathpoint_list(self.search_area)
-        self.search_area = [PathPoint(self.start, 0)]
-        self.clear_pathpoint_list(self.worked_points)
-        self.worked_points = []
-        self.clear_point_list(self.path)
+        self.is_exhausted = False
+        self.is_cache_checked = False
+        self.clear_pathfind()
+        self.reset_search_area()
+        self.clear_search_markers(self.path)
         self.path = []
 
 
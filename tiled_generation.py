@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import multiprocessing
+import random
+from typing import BinaryIO, Iterator
+
+import numpy
+
+from bit_grid import BitGrid, generate_borders, wall_mask
+from eller_algorithm import find_set, merge_sets
+from maze_file import write_header
+from test import Maze, Point
+
+# a tile is a square of tile_size x tile_size labyrinth cells (the last row and column of tiles may be smaller),
+# generated by Eller on its own with its own seed; the tiles are then joined by one passage per edge
+# of a random spanning tree over the tiles, so the whole labyrinth stays perfect: one path between any two cells
+
+
+def generate_tile(task: tuple[int, int, int]) -> tuple[numpy.ndarray, numpy.ndarray]:
+    height, width, seed = task
+    return generate_borders(width, height, random.Random(seed))
+
+
+def get_tile_sizes(length: int, tile_size: int) -> list[int]:
+    return [min(tile_size, length - start) for start in range(0, length, tile_size)]
+
+
+def get_stitches(heights: list[int], widths: list[int], rng: random.Random) -> tuple[dict, dict]:
+    # Kruskal over the tiles with shuffled edges; a kept edge becomes one open border cell at a random place:
+    # right[tile] is the row of the opening in the right border of the tile, down[tile] the column in its bottom
+    edges = [(row, col, True) for row in range(len(heights)) for col in range(len(widths) - 1)]
+    edges += [(row, col, False) for row in range(len(heights) - 1) for col in range(len(widths))]
+    rng.shuffle(edges)
+    parents = {(row, col): (row, col) for row in range(len(heights)) for col in range(len(widths))}
+    right, down = {}, {}
+    for row, col, is_right in edges:
+        other = (row, col + 1) if is_right else (row + 1, col)
+        if find_set(parents, (row, col)) == find_set(parents, other):
+            continue
+        merge_sets(parents, (row, col), other)
+        if is_right:
+            right[row, col] = rng.randrange(heights[row])
+        else:
+            down[row, col] = rng.randrange(widths[col])
+    return right, down
+
+
+def generate_tile_rows(height: int, width: int, tile_size=256, seed: int = None,
+                       processes: int = None) -> Iterator[tuple[numpy.ndarray, numpy.ndarray]]:
+    # right and down borders of a labyrinth of height x width cells, one row of tiles at a time,
+    # so only that many rows are ever held by the caller
+    rng = random.Random(seed)
+    heights, widths = get_tile_sizes(height, tile_size), get_tile_sizes(width, tile_size)
+    # the seeds and stitches come from one generator in a fixed order, the pool does not change the labyrinth
+    tasks = [(tile_height, tile_width, rng.getrandbits(64)) for tile_height in heights for tile_width in widths]
+    right, down = get_stitches(heights, widths, rng)
+    with multiprocessing.Pool(processes) as pool:
+        tiles = pool.imap(generate_tile, tasks)
+        for tile_row, tile_height in enumerate(heights):
+            right_block = numpy.empty((tile_height, width), dtype=bool)
+            down_block = numpy.empty((tile_height, width), dtype=bool)
+            left = 0
+            for tile_col, tile_width in enumerate(widths):
+                right_borders, down_borders = next(tiles)
+                if (tile_row, tile_col) in right:
+                    right_borders[right[tile_row, tile_col], -1] = False
+                if (tile_row, tile_col) in down:
+                    down_borders[-1, down[tile_row, tile_col]] = False
+                right_block[:, left:left + tile_width] = right_borders
+                down_block[:, left:left + tile_width] = down_borders
+                left += tile_width
+            yield right_block, down_block
+
+
+def generate_wall_rows(height: int, width: int, tile_size=256, seed: int = None,
+                       processes: int = None) -> Iterator[numpy.ndarray]:
+    # rows of the field walls (the layout of Maze.generate_walls) for a field of height x width, both odd:
+    # first the top wall, then two field rows per labyrinth row
+    yield numpy.ones((1, width), dtype=bool)
+    for right_block, down_block in generate_tile_rows(height // 2, width // 2, tile_size, seed, processes):
+        yield wall_mask(right_block, down_block)[1:]
+
+
+def generate_tiled_walls(height: int, width: int, tile_size=256, seed: int = None,
+                         processes: int = None) -> numpy.ndarray:
+    walls = numpy.empty((height, width), dtype=bool)
+    top = 0
+    for rows in generate_wall_rows(height, width, tile_size, seed, processes):
+        walls[top:top + len(rows)] = rows
+        top += len(rows)
+    return walls
+
+
+def generate_tiled_maze(height: int, width: int, tile_size=256, seed: int = None, processes: int = None) -> Maze:
+    # compact maze from the top left to the bottom right cell; height and width should be odd
+    grid = BitGrid(height, width)
+    top = 0
+    for rows in generate_wall_rows(height, width, tile_size, seed, processes):
+        grid.set_walls(rows, top)
+        top += len(rows)
+    maze = Maze(height, width, compact=True, grid=grid)
+    maze.set_endpoints(Point(1, 1), Point(height - 2, width - 2))
+    return maze
+
+
+def write_tiled_maze(file: BinaryIO, height: int, width: int, tile_size=256, seed: int = None,
+                     processes: int = None) -> None:
+    # a maze file (see maze_file) written as the rows come; rows do not end on a byte,
+    # so the bits left over from one block are packed with the next one
+    write_header(file, height, width, Point(1, 1), Point(height - 2, width - 2), None)
+    rest = numpy.empty(0, dtype=bool)
+    for rows in generate_wall_rows(height, width, tile_size, seed, processes):
+        bits = numpy.concatenate([rest, rows.ravel()])
+        packed = len(bits) // 8 * 8
+        file.write(numpy.packbits(bits[:packed]).tobytes())
+        rest = bits[packed:]
+    if len(rest):
+        file.write(numpy.packbits(rest).tobytes())
+
+
+def save_tiled_maze(path: str, height: int, width: int, tile_size=256, seed: int = None,
+                    processes: int = None) -> None:
+    with open(path, "wb") as file:
+        write_tiled_maze(file, height, width, tile_size, seed, processes)
+
+
+if __name__ == '__main__':
+    import sys
+    import time
+
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 4001
+    started = time.perf_counter()
+    save_tiled_maze(f"maze_{size}.wamz", size, size, seed=1)
+    print(f"{size}x{size} in {time.perf_counter() - started:.2f} s")